@@ -1,7 +1,28 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, url_for, redirect, g, abort, has_request_context, Response
 import pandas as pd
+import numpy as np
 import os
+import re
+import sys
 import json
+import shutil
+import hashlib
+from collections import OrderedDict
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import bisect
+import itertools
+import unicodedata
+import contextlib
+import time
+import math
+import zlib
+from json.encoder import encode_basestring
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:  # scipy é opcional: sem ele, os alimentos similares são buscados por força bruta
+    cKDTree = None
 
 app = Flask(__name__)
 
@@ -16,7 +37,14 @@ def carregar_categorias():
     global CATEGORIAS
     if CATEGORIAS:
         return CATEGORIAS
-        
+    
+    CATEGORIAS = listar_categorias()
+    return CATEGORIAS
+
+def listar_categorias():
+    """Lista as categorias a partir dos arquivos CSV presentes no diretório de dados"""
+    categorias = []
+    
     # Busca por arquivos de categorias
     arquivos = [f for f in os.listdir(DATA_DIR) if f.startswith('alimentos_') and f.endswith('.csv')]
     
@@ -24,102 +52,1557 @@ def carregar_categorias():
     for arquivo in arquivos:
         nome = arquivo.replace('alimentos_', '').replace('.csv', '')
         if nome not in ['3paginas', 'multipaginas', 'pagina1', 'pagina2', 'pagina3', 'tbca']:
-            CATEGORIAS.append(nome)
+            categorias.append(nome)
     
-    return CATEGORIAS
+    return categorias
 
-# Cache para armazenar os dados já carregados
+# Cache para armazenar os dados já carregados (snapshots somente leitura)
 dados_cache = {}
 
-def carregar_dados(categoria=None):
+# Evita que requisições simultâneas carreguem os mesmos dados em paralelo
+_lock_carga = threading.Lock()
+
+# Versão do arquivo de origem cuja recarga falhou (evita tentar de novo a cada requisição)
+_origens_com_falha = {}
+
+# Versões dos snapshots, usadas nas chaves do cache de resultados
+_versoes_snapshot = itertools.count(1)
+
+# Recarregador em segundo plano (None quando as requisições verificam os arquivos)
+_recarregador = None
+
+# Intervalo entre as verificações dos arquivos de dados pelo recarregador (0 desativa)
+INTERVALO_RECARGA = float(os.environ.get('TBCA_RECARGA_SEGUNDOS', 30))
+
+# Colunas de texto consideradas na busca por termo
+COLUNAS_BUSCA = ['alimento', 'nome', 'descricao', 'nomeIngles', 'nomeCientifico', 'nome_cientifico']
+
+# Colunas dos arquivos CSV mantidas como texto (as demais são convertidas em números)
+COLUNAS_TEXTO_CSV = {'codigo', 'id', 'alimento', 'nome', 'descricao', 'nomeIngles', 'nomeCientifico',
+                     'nome_cientifico', 'grupo', 'marca', 'categoria'}
+
+# Quantidade máxima de threads na leitura dos arquivos CSV das categorias
+LEITORES_CSV = 8
+
+# Campos oferecidos para ordenação na página de resultados
+COLUNAS_ORDENACAO = ['alimento', 'energia']
+
+# Mesma definição de "palavra" usada pelo \b das expressões regulares
+PADRAO_TOKEN = re.compile(r'\w+')
+
+class IndiceBusca:
+    """
+    Índice invertido de uma coluna de texto, normalizada uma única vez na carga
+
+    Os textos ficam concatenados com "\n" e o vocabulário ordenado, para achar prefixos e substrings.
+    """
+
+    def __init__(self, serie):
+        presentes = np.fromiter((isinstance(texto, str) for texto in serie), dtype=bool, count=len(serie))
+        textos = [texto if presente else '' for texto, presente in zip(serie, presentes)]
+        textos = normalizar_textos(textos)
+        self.total = len(textos)
+        self.presentes = presentes
+        self.conteudo = '\n'.join(textos)
+        self.limites = np.cumsum([0] + [len(texto) + 1 for texto in textos])
+
+        postings = {}
+        iniciais = []
+        for posicao, texto in enumerate(textos):
+            inicial = PADRAO_TOKEN.match(texto)
+            iniciais.append(inicial.group() if inicial else None)
+            if texto:
+                for token in set(PADRAO_TOKEN.findall(texto)):
+                    postings.setdefault(token, []).append(posicao)
+
+        self.vocabulario = sorted(postings)
+        self.tokens = {token: np.array(postings[token], dtype=np.int32) for token in self.vocabulario}
+
+        # Posição no vocabulário do token que abre cada texto (-1 se o texto não começa por um token)
+        numeros = {token: numero for numero, token in enumerate(self.vocabulario)}
+        self.iniciais = np.array([numeros[token] if token else -1 for token in iniciais], dtype=np.int32)
+
+        # Vocabulário concatenado ("\n" nunca faz parte de um token) e o início de cada token
+        self.buffer = '\n'.join(self.vocabulario)
+        self.inicios = np.cumsum([0] + [len(token) + 1 for token in self.vocabulario[:-1]]) if self.vocabulario else np.array([], dtype=np.int64)
+
+    def _unir(self, listas):
+        if not listas:
+            return np.array([], dtype=np.int32)
+        if len(listas) == 1:
+            return listas[0]
+        return np.unique(np.concatenate(listas))
+
+    def _intersectar(self, listas):
+        resultado = listas[0]
+        for lista in listas[1:]:
+            resultado = np.intersect1d(resultado, lista, assume_unique=True)
+        return resultado
+
+    def _verificar(self, candidatos, condicao):
+        """Candidatos cujo texto satisfaz condicao(conteudo, início, fim)"""
+        candidatos = candidatos[self.presentes[candidatos]]
+        inicios = self.limites[candidatos].tolist()
+        fins = (self.limites[candidatos + 1] - 1).tolist()
+        conteudo = self.conteudo
+        aprovados = [condicao(conteudo, inicio, fim) for inicio, fim in zip(inicios, fins)]
+        return candidatos[np.array(aprovados, dtype=bool)].astype(np.int32)
+
+    def _todas(self):
+        return np.flatnonzero(self.presentes).astype(np.int32)
+
+    def linhas_token(self, token):
+        """Linhas que contêm o token completo"""
+        return self.tokens.get(token, np.array([], dtype=np.int32))
+
+    def linhas_contendo(self, trecho):
+        """Linhas com algum token que contém o trecho (trecho sem separadores)"""
+        encontrados = []
+        inicio = self.buffer.find(trecho)
+        while inicio != -1:
+            indice = int(np.searchsorted(self.inicios, inicio, side='right')) - 1
+            encontrados.append(self.tokens[self.vocabulario[indice]])
+            # Continua a partir do próximo token do vocabulário
+            if indice + 1 >= len(self.vocabulario):
+                break
+            inicio = self.buffer.find(trecho, int(self.inicios[indice + 1]))
+        return self._unir(encontrados)
+
+    def correspondencia_exata(self, termo):
+        """Equivale a str.contains(rf'\\b{termo}\\b') sobre o texto normalizado"""
+        if PADRAO_TOKEN.fullmatch(termo):
+            return self.linhas_token(termo)
+        pedacos = PADRAO_TOKEN.findall(termo)
+        candidatos = self._intersectar([self.linhas_token(p) for p in pedacos]) if pedacos else self._todas()
+        padrao = re.compile(rf'\b{re.escape(termo)}\b')
+        return self._verificar(candidatos, lambda conteudo, inicio, fim: padrao.search(conteudo, inicio, fim) is not None)
+
+    def correspondencia_parcial(self, termo):
+        """Equivale a str.contains(termo, regex=False) sobre o texto normalizado"""
+        if PADRAO_TOKEN.fullmatch(termo):
+            return self.linhas_contendo(termo)
+        pedacos = PADRAO_TOKEN.findall(termo)
+        candidatos = self._intersectar([self.linhas_contendo(p) for p in pedacos]) if pedacos else self._todas()
+        return self._verificar(candidatos, lambda conteudo, inicio, fim: conteudo.find(termo, inicio, fim) != -1)
+
+    def correspondencia_inicio(self, termo, parciais=None):
+        """Equivale a str.startswith(termo); reaproveita as correspondências parciais"""
+        if parciais is None:
+            parciais = self.correspondencia_parcial(termo)
+        if PADRAO_TOKEN.fullmatch(termo):
+            # O texto começa pelo termo se o seu token inicial começa pelo termo:
+            # esses tokens formam um intervalo contíguo do vocabulário ordenado
+            primeiro = bisect.bisect_left(self.vocabulario, termo)
+            ultimo = bisect.bisect_left(self.vocabulario, termo + '\U0010ffff')
+            iniciais = self.iniciais[parciais]
+            return parciais[(iniciais >= primeiro) & (iniciais < ultimo)]
+        return self._verificar(parciais, lambda conteudo, inicio, fim: conteudo.startswith(termo, inicio, fim))
+
+def construir_indices(df):
+    """Constrói os índices invertidos das colunas de busca disponíveis"""
+    indices = {}
+    for col in COLUNAS_BUSCA:
+        if col not in df.columns:
+            continue
+        # Colunas com o mesmo conteúdo (ex.: 'alimento' e 'nome') compartilham o índice
+        for outra, indice in indices.items():
+            if df[outra].equals(df[col]):
+                indices[col] = indice
+                break
+        else:
+            indices[col] = IndiceBusca(df[col])
+    return indices
+
+def calcular_relevancia(indices, total, termos, busca_exata=False):
+    """Relevância de cada linha para os termos (10 palavra, 5 substring, 3 início)"""
+    relevancia = np.zeros(total, dtype=np.int64)
+    for termo in normalizar_textos(termos):
+        for indice in indices.values():
+            relevancia[indice.correspondencia_exata(termo)] += 10
+            if not busca_exata:
+                parciais = indice.correspondencia_parcial(termo)
+                relevancia[parciais] += 5
+                relevancia[indice.correspondencia_inicio(termo, parciais)] += 3
+    return relevancia
+
+def normalizar_texto(texto):
+    """Texto em minúsculas e sem acentos (decomposição NFKD sem os diacríticos)"""
+    decomposto = unicodedata.normalize('NFKD', texto.lower())
+    return ''.join(c for c in decomposto if not unicodedata.combining(c))
+
+def normalizar_textos(textos):
+    """Aplica normalizar_texto a uma lista de textos de uma só vez"""
+    textos = list(textos)
+    decomposto = unicodedata.normalize('NFKD', '\n'.join(textos).lower())
+    diacriticos = {ord(c): None for c in set(decomposto) if unicodedata.combining(c)}
+    normalizados = decomposto.translate(diacriticos).split('\n')
+    if len(normalizados) != len(textos):
+        # Algum texto contém quebra de linha
+        normalizados = [normalizar_texto(texto) for texto in textos]
+    return normalizados
+
+# Distância de edição máxima da busca aproximada e tamanho do prefixo indexado
+DISTANCIA_MAXIMA = 2
+PREFIXO_APROXIMADO = 7
+
+# Pontos da busca aproximada conforme a distância de edição do token encontrado
+# (distância 0 = mesma palavra, diferindo só em acentos)
+PESOS_APROXIMADOS = {0: 3, 1: 2, 2: 1}
+
+# Máximo de palavras do vocabulário aproveitadas por termo na busca aproximada
+CANDIDATOS_APROXIMADOS = 10
+
+def distancia_maxima(termo):
+    """Erros tolerados conforme o tamanho do termo (termos curtos só sem acentos)"""
+    if len(termo) <= 2:
+        return 0
+    if len(termo) == 3:
+        return 1
+    return DISTANCIA_MAXIMA
+
+def gerar_delecoes(palavra, maxima):
+    """Todas as variantes obtidas apagando até 'maxima' caracteres da palavra"""
+    variantes = {palavra}
+    fronteira = {palavra}
+    for _ in range(maxima):
+        fronteira = {p[:i] + p[i + 1:] for p in fronteira for i in range(len(p))}
+        variantes |= fronteira
+    return variantes
+
+def distancia_edicao(a, b, maxima):
+    """Distância de Damerau-Levenshtein entre a e b, limitada a maxima + 1"""
+    if abs(len(a) - len(b)) > maxima:
+        return maxima + 1
+    antepenultima = None
+    anterior = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        atual = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            custo = 0 if a[i - 1] == b[j - 1] else 1
+            valor = min(anterior[j] + 1, atual[j - 1] + 1, anterior[j - 1] + custo)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                valor = min(valor, antepenultima[j - 2] + 1)
+            atual[j] = valor
+        if min(atual) > maxima:
+            return maxima + 1
+        antepenultima, anterior = anterior, atual
+    return anterior[-1]
+
+class IndiceAproximado:
+    """
+    Índice tolerante a erros de digitação sobre o vocabulário (estilo SymSpell)
+
+    Cada palavra é registrada sob as variantes com até DISTANCIA_MAXIMA caracteres apagados.
+    """
+
+    def __init__(self, frequencias):
+        # frequencias: palavra do vocabulário -> número de linhas que a contêm
+        self.formas = {}
+        self.frequencia = {}
+        for token, quantidade in frequencias.items():
+            normal = normalizar_texto(token)
+            self.formas.setdefault(normal, []).append(token)
+            self.frequencia[normal] = self.frequencia.get(normal, 0) + quantidade
+        
+        self.delecoes = {}
+        for normal in self.formas:
+            for variante in gerar_delecoes(normal[:PREFIXO_APROXIMADO], DISTANCIA_MAXIMA):
+                self.delecoes.setdefault(variante, []).append(normal)
+
+    def sugerir(self, termo, limite=CANDIDATOS_APROXIMADOS):
+        """Pares (palavra, distância) próximos do termo, dos mais parecidos para os menos"""
+        termo = normalizar_texto(termo)
+        maxima = distancia_maxima(termo)
+        candidatos = set()
+        for variante in gerar_delecoes(termo[:PREFIXO_APROXIMADO], maxima):
+            candidatos.update(self.delecoes.get(variante, ()))
+        
+        encontrados = []
+        for candidato in candidatos:
+            distancia = distancia_edicao(termo, candidato, maxima)
+            if distancia <= maxima:
+                encontrados.append((distancia, -self.frequencia[candidato], candidato))
+        encontrados.sort()
+        return [(token, distancia) for distancia, _, normal in encontrados[:limite] for token in self.formas[normal]]
+
+def construir_indice_aproximado(indices):
+    """Constrói o índice aproximado com o vocabulário de todas as colunas de busca"""
+    frequencias = {}
+    # Colunas que compartilham o mesmo índice contam uma única vez
+    for indice in {id(indice): indice for indice in indices.values()}.values():
+        for token, linhas in indice.tokens.items():
+            frequencias[token] = frequencias.get(token, 0) + len(linhas)
+    return IndiceAproximado(frequencias)
+
+def calcular_relevancia_aproximada(indices, indice_aproximado, total, termos):
+    """Busca tolerante a erros, usada quando nenhum resultado foi encontrado"""
+    relevancia = np.zeros(total, dtype=np.int64)
+    for termo in termos:
+        for pedaco in PADRAO_TOKEN.findall(termo):
+            sugestoes = indice_aproximado.sugerir(pedaco)
+            if not sugestoes:
+                continue
+            for indice in indices.values():
+                pontos = np.zeros(total, dtype=np.int64)
+                # Da palavra mais distante para a mais próxima: vale o maior peso
+                for token, distancia in reversed(sugestoes):
+                    pontos[indice.linhas_token(token)] = PESOS_APROXIMADOS[distancia]
+                relevancia += pontos
+    return relevancia
+
+class IndiceSugestoes:
+    """
+    Índice de prefixos do autocompletar sobre nomes e palavras do vocabulário
+
+    Um prefixo é um intervalo contíguo de cada lista ordenada (busca binária).
+    """
+
+    def __init__(self, nomes, exibidos, posicoes, frequencias, formas=None):
+        # nomes: nomes normalizados; exibidos: nomes originais; posicoes: linhas na tabela
+        ordem = sorted(range(len(nomes)), key=nomes.__getitem__)
+        self.nomes = [nomes[i] for i in ordem]
+        self.exibidos = [exibidos[i] for i in ordem]
+        self.posicoes = np.array([posicoes[i] for i in ordem], dtype=np.int32)
+        comprimentos = np.array([len(nome) for nome in self.nomes], dtype=np.int64)
+        self.preferencia_nomes = comprimentos * (len(self.nomes) + 1) + np.arange(len(self.nomes))
+
+        # frequencias: palavra normalizada -> número de linhas; formas: palavra -> forma com acentos
+        self.palavras = sorted(frequencias)
+        self.formas = formas or {}
+        quantidades = np.array([frequencias[palavra] for palavra in self.palavras], dtype=np.int64)
+        self.frequencias = quantidades
+        self.preferencia_palavras = (quantidades.max(initial=0) - quantidades) * (len(self.palavras) + 1) + np.arange(len(self.palavras))
+
+    @staticmethod
+    def _intervalo(lista, prefixo):
+        return bisect.bisect_left(lista, prefixo), bisect.bisect_left(lista, prefixo + '\U0010ffff')
+
+    @staticmethod
+    def _melhores(preferencia, inicio, fim, limite):
+        return inicio + selecionar_pagina(preferencia[inicio:fim], 0, limite)
+
+    def sugerir(self, prefixo, limite):
+        """Palavras que completam o prefixo e alimentos cujo nome começa por ele"""
+        prefixo = prefixo.lstrip()
+        normal = normalizar_texto(prefixo)
+        termos = []
+        ultima = re.search(r'\w+$', prefixo)
+        if ultima:
+            # As palavras anteriores ficam como foram digitadas; só a última é completada
+            anteriores = prefixo[:ultima.start()]
+            inicio, fim = self._intervalo(self.palavras, normalizar_texto(ultima.group()))
+            for i in self._melhores(self.preferencia_palavras, inicio, fim, limite).tolist():
+                palavra = self.palavras[i]
+                termos.append((anteriores + self.formas.get(palavra, palavra), int(self.frequencias[i])))
+        
+        alimentos = []
+        if normal:
+            inicio, fim = self._intervalo(self.nomes, normal)
+            for i in self._melhores(self.preferencia_nomes, inicio, fim, limite).tolist():
+                alimentos.append((int(self.posicoes[i]), self.exibidos[i]))
+        return termos, alimentos
+
+def construir_indice_sugestoes(df, indices):
+    """Monta o índice do autocompletar com os nomes dos alimentos e o vocabulário da busca"""
+    coluna = next((col for col in ('alimento', 'nome') if col in df.columns), None)
+    nomes, exibidos, posicoes, formas = [], [], [], {}
+    if coluna is not None:
+        serie = df[coluna]
+        presentes = np.flatnonzero(serie.notna().to_numpy())
+        # Nomes repetidos viram uma única sugestão (a primeira linha com o nome)
+        textos = serie.iloc[presentes].astype(str).tolist()
+        primeiros = {}
+        for posicao, exibido, nome in zip(presentes.tolist(), textos, normalizar_textos(textos)):
+            primeiros.setdefault(nome, (posicao, exibido))
+        nomes = list(primeiros)
+        posicoes = [posicao for posicao, _ in primeiros.values()]
+        exibidos = [exibido for _, exibido in primeiros.values()]
+        # Forma original (com acentos) de cada palavra normalizada dos nomes
+        for original, normal in zip(exibidos, nomes):
+            tokens_originais = PADRAO_TOKEN.findall(original.lower())
+            tokens_normais = PADRAO_TOKEN.findall(normal)
+            if len(tokens_originais) == len(tokens_normais):
+                for token_original, token_normal in zip(tokens_originais, tokens_normais):
+                    formas.setdefault(token_normal, token_original)
+    
+    # Número de alimentos com cada palavra em alguma das colunas de busca
+    linhas_por_token = {}
+    for indice in {id(indice): indice for indice in indices.values()}.values():
+        for token, linhas in indice.tokens.items():
+            linhas_por_token.setdefault(token, []).append(linhas)
+    frequencias = {
+        token: len(listas[0]) if len(listas) == 1 else len(np.unique(np.concatenate(listas)))
+        for token, listas in linhas_por_token.items()
+    }
+    return IndiceSugestoes(nomes, exibidos, posicoes, frequencias, formas)
+
+# A partir de quantos alimentos a busca de similares usa uma KD-tree (se o scipy estiver instalado)
+LIMIAR_ARVORE_SIMILARES = 20000
+
+class IndiceSimilares:
+    """
+    Vizinhos mais próximos de um alimento no espaço dos nutrientes escolhidos
+
+    Os nutrientes são padronizados (média 0, desvio 1) para que a unidade não domine a distância.
+    """
+
+    def __init__(self, valores, posicoes, media, escala):
+        validos = ~np.isnan(valores).any(axis=1)
+        self.posicoes = posicoes[validos]
+        self.media = media
+        self.escala = escala
+        self.matriz = np.ascontiguousarray((valores[validos] - media) / escala, dtype=np.float32)
+        self.normas = np.einsum('ij,ij->i', self.matriz, self.matriz)
+        self.arvore = cKDTree(self.matriz) if cKDTree is not None and len(self.matriz) >= LIMIAR_ARVORE_SIMILARES else None
+
+    def vizinhos(self, valores, quantidade, excluir=None):
+        """Posições e distâncias dos alimentos mais próximos dos valores dados"""
+        ponto = ((np.asarray(valores, dtype=np.float64) - self.media) / self.escala).astype(np.float32)
+        # Um vizinho a mais, para compensar o próprio alimento de referência
+        quantidade_busca = min(quantidade + (excluir is not None), len(self.posicoes))
+        if quantidade_busca == 0:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float64)
+        
+        if self.arvore is not None:
+            distancias, indices = self.arvore.query(ponto, k=quantidade_busca)
+            distancias, indices = np.atleast_1d(distancias), np.atleast_1d(indices)
+        else:
+            # |x - p|² = |x|² - 2 x·p + |p|², com uma única multiplicação matriz-vetor
+            quadrados = np.maximum(self.normas - 2 * (self.matriz @ ponto) + ponto @ ponto, 0)
+            indices = selecionar_pagina(quadrados, 0, quantidade_busca)
+            distancias = np.sqrt(quadrados[indices])
+        
+        posicoes = self.posicoes[indices]
+        if excluir is not None:
+            mantidos = posicoes != excluir
+            posicoes, distancias = posicoes[mantidos], distancias[mantidos]
+        return posicoes[:quantidade], distancias[:quantidade].astype(np.float64)
+
+class SnapshotDados:
+    """Dados carregados e seus índices de busca, somente leitura entre as requisições"""
+
+    def __init__(self, df, origem=None):
+        self._df = df
+        self.origem = origem
+        self.versao = next(_versoes_snapshot)
+        self.total = len(df)
+        self.colunas = tuple(df.columns)
+        self.colunas_busca = [col for col in COLUNAS_BUSCA if col in self.colunas]
+        self.colunas_nutrientes = mapear_colunas_nutrientes(df)
+        self.indices = construir_indices(df)
+        self.indice_aproximado = construir_indice_aproximado(self.indices)
+        self.posicoes_por_categoria = construir_particoes(df)
+        self.posicoes_por_codigo = construir_indice_codigos(df)
+        self.categorias = None
+        self._particoes = {}
+        self._postos = {}
+        self._valores = {}
+        self._ordenados = {}
+        self._sugestoes = None
+        self._matriz = None
+        self._similares = {}
+
+    @property
+    def df(self):
+        """Tabela completa; deve ser tratada como somente leitura"""
+        return self._df
+
+    @property
+    def empty(self):
+        return self.total == 0
+
+    def __len__(self):
+        return self.total
+
+    def pontuar(self, termos, busca_exata=False):
+        """Retorna um array novo com a relevância de cada linha para os termos"""
+        return calcular_relevancia(self.indices, self.total, termos, busca_exata)
+
+    def pontuar_aproximado(self, termos):
+        """Retorna um array novo com a relevância da busca tolerante a erros"""
+        return calcular_relevancia_aproximada(self.indices, self.indice_aproximado, self.total, termos)
+
+    def posicoes_tabela(self, locais):
+        """Converte posições da visão em posições da tabela"""
+        return locais
+
+    def aquecer(self):
+        """Monta antecipadamente as estruturas criadas sob demanda pelas buscas"""
+        for categoria in self.posicoes_por_categoria:
+            self.particao(categoria)
+        for coluna in COLUNAS_ORDENACAO:
+            if coluna in self.colunas:
+                self.postos(coluna)
+                self.postos(coluna, decrescente=True)
+        for coluna in self.colunas_nutrientes.values():
+            self.indice_ordenado(coluna)
+        self.indice_sugestoes
+
+    @property
+    def indice_sugestoes(self):
+        """Índice do autocompletar, montado no primeiro uso"""
+        if self._sugestoes is None:
+            self._sugestoes = construir_indice_sugestoes(self._df, self.indices)
+        return self._sugestoes
+
+    def sugerir(self, prefixo, limite):
+        """Sugestões do autocompletar: palavras que completam o prefixo e alimentos"""
+        termos, alimentos = self.indice_sugestoes.sugerir(prefixo, limite)
+        codigos = self.codigos([posicao for posicao, _ in alimentos])
+        return {
+            'termos': [{'texto': texto, 'alimentos': quantidade} for texto, quantidade in termos],
+            'alimentos': [{'codigo': codigo, 'nome': nome} for codigo, (_, nome) in zip(codigos, alimentos)],
+        }
+
+    def codigos(self, posicoes):
+        """Código de cada posição na tabela ('codigo' ou 'id'; sem essas colunas, a própria posição)"""
+        coluna = next((col for col in ('codigo', 'id') if col in self.colunas), None)
+        if coluna is None:
+            return [str(posicao) for posicao in posicoes]
+        return [str(codigo) for codigo in self._df[coluna].iloc[list(posicoes)].tolist()]
+
+    def postos(self, coluna, decrescente=False):
+        """Posto denso de cada linha na ordenação da coluna (ausentes no fim)"""
+        chave = (coluna, decrescente)
+        postos = self._postos.get(chave)
+        if postos is None:
+            postos = self._df[coluna].rank(method='dense', ascending=not decrescente, na_option='bottom')
+            postos = postos.to_numpy(dtype=np.int64)
+            postos.flags.writeable = False
+            self._postos[chave] = postos
+        return postos
+
+    def valores(self, coluna):
+        """Coluna numérica da tabela como array float32 (ausentes viram NaN)"""
+        valores = self._valores.get(coluna)
+        if valores is None:
+            valores = self._df[coluna].to_numpy(dtype=np.float32, na_value=np.nan)
+            valores.flags.writeable = False
+            self._valores[coluna] = valores
+        return valores
+
+    def matriz_nutrientes(self):
+        """Nomes e matriz (alimentos x nutrientes) dos valores por 100 g"""
+        if self._matriz is None:
+            nomes = list(self.colunas_nutrientes)
+            matriz = np.empty((len(self._df), len(nomes)), dtype=np.float64)
+            for j, nome in enumerate(nomes):
+                matriz[:, j] = self._df[self.colunas_nutrientes[nome]].to_numpy(dtype=np.float64, na_value=np.nan)
+            matriz.flags.writeable = False
+            self._matriz = (nomes, matriz)
+        return self._matriz
+
+    def indice_similares(self, nutrientes):
+        """Índice de similares das linhas da visão nos nutrientes dados"""
+        indice = self._similares.get(nutrientes)
+        if indice is None:
+            nomes, matriz = self.matriz_nutrientes()
+            colunas = [nomes.index(nutriente) for nutriente in nutrientes]
+            # Padronização com as estatísticas da tabela inteira, igual em todas as categorias
+            media = np.nanmean(matriz[:, colunas], axis=0)
+            escala = np.nanstd(matriz[:, colunas], axis=0)
+            escala[~(escala > 0)] = 1.0
+            posicoes = self.posicoes_tabela(np.arange(self.total))
+            indice = IndiceSimilares(matriz[np.ix_(posicoes, colunas)], posicoes, media, escala)
+            # Só o conjunto padrão fica guardado; os demais são montados a cada consulta
+            if nutrientes == ler_nutrientes_similares(None, self):
+                self._similares[nutrientes] = indice
+        return indice
+
+    def indice_ordenado(self, coluna):
+        """Posições e valores de uma coluna numérica em ordem crescente"""
+        indice = self._ordenados.get(coluna)
+        if indice is None:
+            valores = self.valores(coluna)
+            ordem = np.argsort(valores, kind='stable').astype(np.int32)
+            ordenados = valores[ordem]
+            ordem.flags.writeable = False
+            ordenados.flags.writeable = False
+            indice = self._ordenados[coluna] = (ordem, ordenados)
+        return indice
+
+    def chaves_ordenacao(self, ordenar, posicoes, relevancia):
+        """
+        Chave inteira de ordenação de cada resultado (menor chave vem primeiro)
+
+        Campos desconhecidos ordenam pela relevância; a posição desempata e deixa as páginas estáveis.
+        """
+        campo = ordenar[1:] if ordenar.startswith('-') else ordenar
+        if campo in self.colunas:
+            primaria = self.postos(campo, ordenar.startswith('-'))[posicoes]
+        else:
+            primaria = relevancia.max(initial=0) - relevancia
+        return primaria.astype(np.int64) * len(self._df) + posicoes
+
+    def posicao_codigo(self, codigo):
+        """Posição na tabela do alimento com o código informado (None se não existir)"""
+        if self.posicoes_por_codigo is not None:
+            return self.posicoes_por_codigo.get(codigo)
+        try:
+            posicao = int(codigo)
+        except ValueError:
+            return None
+        return posicao if 0 <= posicao < len(self._df) else None
+
+    def reconstruir(self, posicoes, relevancia=None, campos=None):
+        """Monta as linhas de uma página a partir das posições na tabela"""
+        if campos is None:
+            resultado = self._df.iloc[posicoes]
+        else:
+            resultado = self._df.iloc[posicoes, [self._df.columns.get_loc(campo) for campo in campos if campo in self.colunas]]
+        if relevancia is not None and (campos is None or 'relevancia' in campos):
+            resultado = resultado.assign(relevancia=relevancia)
+        return resultado
+
+    def _categorias_casadas(self, categoria):
+        chave = categoria.strip().lower().replace(' ', '_')
+        return tuple(valor for valor in self.posicoes_por_categoria if chave in valor)
+
+    def tem_categoria(self, categoria):
+        """Indica se alguma categoria da tabela casa com a categoria pedida"""
+        return bool(self._categorias_casadas(categoria))
+
+    def particao(self, categoria):
+        """
+        Visão das linhas de uma categoria, sem copiar a tabela
+
+        Casa com as categorias que contêm o nome; sem correspondência, vale a tabela inteira.
+        """
+        valores = self._categorias_casadas(categoria)
+        if not valores:
+            return self
+        # Indexada pelas categorias casadas: nomes que casam com as mesmas categorias
+        # compartilham a visão e nomes sem correspondência não ficam guardados
+        particao = self._particoes.get(valores)
+        if particao is None:
+            posicoes = np.sort(np.concatenate([self.posicoes_por_categoria[valor] for valor in valores]))
+            particao = ParticaoDados(self, posicoes, valores)
+            self._particoes[valores] = particao
+        return particao
+
+class ParticaoDados(SnapshotDados):
+    """Visão de uma categoria sobre um snapshot: compartilha a tabela e os índices"""
+
+    def __init__(self, base, posicoes, categorias):
+        self._base = base
+        self._df = base.df
+        self.origem = base.origem
+        self.versao = base.versao
+        self.posicoes = posicoes
+        self.total = len(posicoes)
+        self.colunas = base.colunas
+        self.colunas_busca = base.colunas_busca
+        self.colunas_nutrientes = base.colunas_nutrientes
+        self.indices = base.indices
+        self.indice_aproximado = base.indice_aproximado
+        self.posicoes_por_categoria = {}
+        self.posicoes_por_codigo = base.posicoes_por_codigo
+        self.categorias = categorias
+        self._particoes = {}
+        self._similares = {}
+
+    @property
+    def df(self):
+        """Linhas da categoria (cópia montada sob demanda)"""
+        return self._df.iloc[self.posicoes]
+
+    def posicoes_tabela(self, locais):
+        return self.posicoes[locais]
+
+    def postos(self, coluna, decrescente=False):
+        return self._base.postos(coluna, decrescente)
+
+    @property
+    def indice_sugestoes(self):
+        return self._base.indice_sugestoes
+
+    def valores(self, coluna):
+        return self._base.valores(coluna)
+
+    def indice_ordenado(self, coluna):
+        return self._base.indice_ordenado(coluna)
+
+    def matriz_nutrientes(self):
+        return self._base.matriz_nutrientes()
+
+    def pontuar(self, termos, busca_exata=False):
+        return self._base.pontuar(termos, busca_exata)[self.posicoes]
+
+    def pontuar_aproximado(self, termos):
+        return self._base.pontuar_aproximado(termos)[self.posicoes]
+
+    def tem_categoria(self, categoria):
+        return self._base.tem_categoria(categoria)
+
+    def particao(self, categoria):
+        return self._base.particao(categoria)
+
+def mapear_colunas_nutrientes(df):
+    """Mapeia cada nutriente canônico para a coluna numérica da tabela que o contém"""
+    colunas = {}
+    for coluna in df.columns:
+        if pd.api.types.is_numeric_dtype(df[coluna]):
+            colunas.setdefault(resolver_nutriente(coluna)[0], coluna)
+    return colunas
+
+def construir_indice_codigos(df):
+    """Mapeia cada código para a sua posição na tabela (None sem coluna de código)"""
+    coluna = next((col for col in ('codigo', 'id') if col in df.columns), None)
+    if coluna is None:
+        return None
+    codigos = df[coluna]
+    validos = np.flatnonzero(codigos.notna().to_numpy())[::-1]
+    return dict(zip(codigos.iloc[validos].astype(str).tolist(), validos.tolist()))
+
+def construir_particoes(df):
+    """Mapeia cada categoria para as posições (ordenadas) das suas linhas"""
+    if 'categoria' in df.columns:
+        categorias = df['categoria']
+    elif 'grupo' in df.columns:
+        categorias = df['grupo'].astype(str).str.lower().str.replace(' ', '_', regex=False)
+    else:
+        return {}
+    
+    categorias = categorias.astype('category')
+    codigos = categorias.cat.codes.to_numpy()
+    ordem = np.argsort(codigos, kind='stable').astype(np.int32)
+    limites = np.searchsorted(codigos[ordem], np.arange(len(categorias.cat.categories) + 1))
+    return {str(valor): ordem[limites[i]:limites[i + 1]] for i, valor in enumerate(categorias.cat.categories)}
+
+def obter_snapshot(cache_key, carregar, assinar):
+    """Retorna o snapshot em cache ou o constrói com a função de carga informada"""
+    snapshot = dados_cache.get(cache_key)
+    if snapshot is not None and _recarregador is not None:
+        return snapshot
+    return atualizar_snapshot(cache_key, carregar, assinar)
+
+def atualizar_snapshot(cache_key, carregar, assinar, aquecer=False):
     """
-    Carrega os dados do arquivo JSON principal (tbca_dados_completos.json)
+    Retorna o snapshot atual, construindo outro se os arquivos de origem mudaram
+
+    O snapshot novo é montado por completo antes de ser publicado com uma única atribuição.
     """
+    origem = assinar()
+    
     # Primeiro tenta carregar do cache
-    cache_key = categoria if categoria else 'todos'
-    if cache_key in dados_cache:
-        return dados_cache[cache_key]
+    snapshot = dados_cache.get(cache_key)
+    if snapshot is not None and origem in (snapshot.origem, _origens_com_falha.get(cache_key)):
+        return snapshot
+    
+    with _lock_carga:
+        snapshot = dados_cache.get(cache_key)
+        if snapshot is None or snapshot.origem != origem:
+            with metricas.etapa('carga_dados'):
+                novo = SnapshotDados(carregar(), origem)
+            # Só guarda no cache cargas bem-sucedidas; em caso de falha, mantém os dados anteriores
+            if not novo.empty:
+                if aquecer:
+                    with metricas.etapa('aquecimento'):
+                        novo.aquecer()
+                dados_cache[cache_key] = novo
+                _origens_com_falha.pop(cache_key, None)
+                cache_consultas.limpar()
+                snapshot = novo
+            elif snapshot is None:
+                snapshot = novo
+            else:
+                _origens_com_falha[cache_key] = origem
+    return snapshot
+
+def recarregar_dados():
+    """Verifica os arquivos de dados e troca os snapshots que mudaram"""
+    global CATEGORIAS
+    CATEGORIAS = listar_categorias()
+    
+    atualizar_snapshot(*fonte_dados(), aquecer=True)
+
+class RecarregadorDados(threading.Thread):
+    """Thread que verifica periodicamente os arquivos de dados e recarrega os que mudaram"""
+
+    def __init__(self, intervalo):
+        super().__init__(name='tbca-recarregador', daemon=True)
+        self.intervalo = intervalo
+        self._parar = threading.Event()
+
+    def run(self):
+        while not self._parar.wait(self.intervalo):
+            try:
+                recarregar_dados()
+            except Exception as e:
+                print(f"Erro ao recarregar os dados: {e}")
+
+    def parar(self):
+        self._parar.set()
+
+def iniciar_recarregador(intervalo=None):
+    """
+    Carrega os dados e inicia o recarregador em segundo plano
+
+    Em servidores com vários workers, deve ser chamado depois do fork.
+    """
+    global _recarregador
+    intervalo = INTERVALO_RECARGA if intervalo is None else intervalo
+    if _recarregador is not None or intervalo <= 0:
+        return _recarregador
+    
+    # A primeira carga acontece antes de atender requisições
+    recarregar_dados()
+    _recarregador = RecarregadorDados(intervalo)
+    _recarregador.start()
+    return _recarregador
+
+class CacheConsultas:
+    """
+    Cache LRU dos resultados das buscas, limitado por entradas e por bytes
+
+    Guarda só arrays NumPy; as chaves incluem a versão do snapshot.
+    """
+
+    def __init__(self, max_entradas, max_bytes):
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self._entradas = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+        self.remocoes = 0
+
+    def obter(self, chave):
+        """Retorna o valor em cache (ou None), marcando a entrada como usada"""
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is None:
+                self.falhas += 1
+                return None
+            self._entradas.move_to_end(chave)
+            self.acertos += 1
+            return entrada[0]
+
+    def guardar(self, chave, valor):
+        """Guarda uma tupla de arrays, removendo as entradas menos usadas se preciso"""
+        tamanho = sum(array.nbytes for array in valor if array is not None)
+        if self.max_entradas <= 0 or tamanho > self.max_bytes:
+            return
+        for array in valor:
+            if array is not None:
+                array.flags.writeable = False
+        
+        with self._lock:
+            anterior = self._entradas.pop(chave, None)
+            if anterior is not None:
+                self._bytes -= anterior[1]
+            self._entradas[chave] = (valor, tamanho)
+            self._bytes += tamanho
+            while len(self._entradas) > self.max_entradas or self._bytes > self.max_bytes:
+                _, (_, removido) = self._entradas.popitem(last=False)
+                self._bytes -= removido
+                self.remocoes += 1
+
+    def limpar(self):
+        """Descarta todas as entradas (ex.: quando os dados mudam)"""
+        with self._lock:
+            self._entradas.clear()
+            self._bytes = 0
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                'entradas': len(self._entradas),
+                'bytes': self._bytes,
+                'acertos': self.acertos,
+                'falhas': self.falhas,
+                'remocoes': self.remocoes,
+            }
+
+# Cache de resultados das buscas (tamanho configurável por variáveis de ambiente)
+cache_consultas = CacheConsultas(
+    max_entradas=int(os.environ.get('TBCA_CACHE_CONSULTAS', 1024)),
+    max_bytes=int(os.environ.get('TBCA_CACHE_CONSULTAS_MB', 64)) * 1024 * 1024,
+)
+
+# Faixas (em segundos) dos histogramas de tempo das etapas
+LIMITES_HISTOGRAMA = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 10.0)
+
+class Metricas:
+    """Tempos por etapa e contadores das requisições, expostos em /metrics"""
+
+    def __init__(self, ativa):
+        self.ativa = ativa
+        self._lock = threading.Lock()
+        # (endpoint, etapa) -> [contagem por faixa do histograma..., soma, total]
+        self._tempos = {}
+        # (nome, endpoint) -> valor
+        self._contadores = {}
+
+    @staticmethod
+    def _endpoint():
+        return (request.endpoint or 'desconhecido') if has_request_context() else 'recarga'
+
+    def etapa(self, nome):
+        """Contexto que mede o tempo de uma etapa (ex.: with metricas.etapa('pontuacao'))"""
+        if not self.ativa:
+            return contextlib.nullcontext()
+        return self._medir(nome)
+
+    @contextlib.contextmanager
+    def _medir(self, nome):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar_tempo(nome, time.perf_counter() - inicio)
+
+    def registrar_tempo(self, etapa, segundos, endpoint=None):
+        chave = (endpoint or self._endpoint(), etapa)
+        faixa = bisect.bisect_left(LIMITES_HISTOGRAMA, segundos)
+        with self._lock:
+            valores = self._tempos.get(chave)
+            if valores is None:
+                valores = self._tempos[chave] = [0] * (len(LIMITES_HISTOGRAMA) + 1) + [0.0, 0]
+            valores[faixa] += 1
+            valores[-2] += segundos
+            valores[-1] += 1
+
+    def contar(self, nome, valor=1, endpoint=None):
+        """Soma ao contador (ex.: linhas avaliadas e encontradas pela busca)"""
+        if not self.ativa:
+            return
+        chave = (nome, endpoint or self._endpoint())
+        with self._lock:
+            self._contadores[chave] = self._contadores.get(chave, 0) + valor
+
+    def texto_prometheus(self):
+        """Métricas no formato de texto do Prometheus"""
+        with self._lock:
+            tempos = {chave: list(valores) for chave, valores in self._tempos.items()}
+            contadores = dict(self._contadores)
+        
+        linhas = [
+            '# HELP tbca_etapa_segundos Tempo gasto em cada etapa das requisições',
+            '# TYPE tbca_etapa_segundos histogram',
+        ]
+        for (endpoint, etapa), valores in sorted(tempos.items()):
+            rotulos = f'endpoint="{endpoint}",etapa="{etapa}"'
+            acumulado = 0
+            for limite, quantidade in zip(LIMITES_HISTOGRAMA + ('+Inf',), valores):
+                acumulado += quantidade
+                linhas.append(f'tbca_etapa_segundos_bucket{{{rotulos},le="{limite}"}} {acumulado}')
+            linhas.append(f'tbca_etapa_segundos_sum{{{rotulos}}} {valores[-2]:.6f}')
+            linhas.append(f'tbca_etapa_segundos_count{{{rotulos}}} {valores[-1]}')
+        
+        for nome in sorted({nome for nome, _ in contadores}):
+            linhas.append(f'# TYPE tbca_{nome}_total counter')
+            for (contador, endpoint), valor in sorted(contadores.items()):
+                if contador == nome:
+                    linhas.append(f'tbca_{nome}_total{{endpoint="{endpoint}"}} {valor}')
+        
+        # Estado do cache de resultados das buscas
+        estatisticas = cache_consultas.estatisticas()
+        for nome in ('acertos', 'falhas', 'remocoes'):
+            linhas.append(f'# TYPE tbca_cache_consultas_{nome}_total counter')
+            linhas.append(f'tbca_cache_consultas_{nome}_total {estatisticas[nome]}')
+        for nome in ('entradas', 'bytes'):
+            linhas.append(f'# TYPE tbca_cache_consultas_{nome} gauge')
+            linhas.append(f'tbca_cache_consultas_{nome} {estatisticas[nome]}')
+        
+        linhas.append('# TYPE tbca_dados_linhas gauge')
+        for chave, snapshot in list(dados_cache.items()):
+            linhas.append(f'tbca_dados_linhas{{fonte="{chave}"}} {snapshot.total}')
+        return '\n'.join(linhas) + '\n'
+
+metricas = Metricas(ativa=os.environ.get('TBCA_METRICAS', '0') not in ('', '0'))
+
+class PerfilAmostragem(threading.Thread):
+    """Profiler por amostragem das requisições, em pilhas colapsadas"""
+
+    def __init__(self, intervalo=0.005):
+        super().__init__(name='tbca-perfil', daemon=True)
+        self.intervalo = intervalo
+        self._parar = threading.Event()
+        self._lock = threading.Lock()
+        # id da thread -> endpoint da requisição em andamento
+        self._requisicoes = {}
+        # endpoint -> {pilha colapsada: amostras}
+        self._amostras = {}
+
+    def entrar(self, endpoint):
+        self._requisicoes[threading.get_ident()] = endpoint
+
+    def sair(self):
+        self._requisicoes.pop(threading.get_ident(), None)
+
+    @staticmethod
+    def _colapsar(quadro):
+        funcoes = []
+        while quadro is not None and len(funcoes) < 200:
+            funcoes.append(f"{quadro.f_globals.get('__name__', '?')}:{quadro.f_code.co_name}")
+            quadro = quadro.f_back
+        return ';'.join(reversed(funcoes))
+
+    def run(self):
+        while not self._parar.wait(self.intervalo):
+            quadros = sys._current_frames()
+            with self._lock:
+                for thread, endpoint in list(self._requisicoes.items()):
+                    quadro = quadros.get(thread)
+                    if quadro is not None:
+                        pilhas = self._amostras.setdefault(endpoint, {})
+                        pilha = self._colapsar(quadro)
+                        pilhas[pilha] = pilhas.get(pilha, 0) + 1
+
+    def parar(self):
+        self._parar.set()
+
+    def pilhas(self, endpoint=None):
+        """Amostras no formato de pilha colapsada, de um endpoint ou de todos"""
+        with self._lock:
+            amostras = {nome: dict(pilhas) for nome, pilhas in self._amostras.items()
+                        if endpoint is None or nome == endpoint}
+        return ''.join(f'{nome};{pilha} {quantidade}\n' for nome, pilhas in sorted(amostras.items())
+                       for pilha, quantidade in sorted(pilhas.items(), key=lambda item: -item[1]))
+
+    def salvar(self, diretorio):
+        """Grava um arquivo .folded por endpoint no diretório; retorna os caminhos"""
+        os.makedirs(diretorio, exist_ok=True)
+        with self._lock:
+            endpoints = list(self._amostras)
+        caminhos = []
+        for endpoint in endpoints:
+            caminho = os.path.join(diretorio, f'perfil_{endpoint}.folded')
+            with open(caminho, 'w', encoding='utf-8') as f:
+                f.write(self.pilhas(endpoint))
+            caminhos.append(caminho)
+        return caminhos
+
+_perfil = None
+
+def iniciar_perfil(intervalo=None):
+    """Liga o profiler por amostragem (uma vez por processo); retorna a thread"""
+    global _perfil
+    if _perfil is None or not _perfil.is_alive():
+        _perfil = PerfilAmostragem(intervalo or float(os.environ.get('TBCA_PERFIL_INTERVALO', 0.005)))
+        _perfil.start()
+    return _perfil
+
+def parar_perfil(diretorio=None):
+    """Desliga o profiler e retorna os arquivos gravados no diretório informado"""
+    if _perfil is None:
+        return []
+    _perfil.parar()
+    return _perfil.salvar(diretorio) if diretorio else []
+
+@app.before_request
+def iniciar_medicao():
+    if metricas.ativa:
+        g.inicio_requisicao = time.perf_counter()
+        if _perfil is not None and _perfil.is_alive():
+            _perfil.entrar(request.endpoint or 'desconhecido')
+
+@app.after_request
+def registrar_medicao(resposta):
+    if metricas.ativa and 'inicio_requisicao' in g:
+        metricas.registrar_tempo('requisicao', time.perf_counter() - g.inicio_requisicao)
+        metricas.contar(f'respostas_{resposta.status_code // 100}xx')
+    return resposta
+
+@app.teardown_request
+def encerrar_medicao(erro=None):
+    if _perfil is not None:
+        _perfil.sair()
+
+def chave_consulta(endpoint, dados, termo_busca, busca_exata, *parametros):
+    """Monta a chave normalizada de uma consulta para o cache de resultados"""
+    termo = termo_busca.lower() if busca_exata else ' '.join(termo_busca.lower().split())
+    parametros = tuple(p.strip() if isinstance(p, str) else p for p in parametros)
+    # A categoria entra pelas categorias da visão resolvida, não pelo texto pedido
+    return (endpoint, dados.versao, dados.categorias, termo, busca_exata) + parametros
+
+def assinatura_fonte(caminho):
+    """mtime e tamanho do arquivo de origem dos dados (None se ele não existir)"""
+    try:
+        info = os.stat(caminho)
+    except OSError:
+        return None
+    return (info.st_mtime_ns, info.st_size)
+
+def assinatura_dados():
+    """Assinatura dos arquivos de dados (JSON principal ou CSV das categorias)"""
+    arquivo_json = os.path.join(DATA_DIR, 'tbca_dados_completos.json')
+    assinatura = assinatura_fonte(arquivo_json)
+    if assinatura is not None:
+        return ('json',) + assinatura
+    arquivos = tuple((categoria, assinatura_fonte(arquivo_categoria(categoria))) for categoria in sorted(listar_categorias()))
+    return ('csv',) + arquivos if arquivos else None
+
+def carregar_dados(categoria=None):
+    """Retorna o snapshot dos dados da categoria (ou de todos os dados)"""
+    snapshot = obter_snapshot(*fonte_dados())
+    if not categoria:
+        return snapshot
+    return snapshot.particao(categoria)
+
+def fonte_dados():
+    """Chave no cache, função de carga e função de assinatura dos dados"""
+    return 'todos', ler_dados, assinatura_dados
+
+# Versão do formato do cache colunar; incrementar ao mudar a estrutura gravada
+VERSAO_CACHE = 3
+# Nome dos diretórios de dados do cache (<sha256[:16]>_v<versão>); só eles são removidos
+PADRAO_DIRETORIO_CACHE = re.compile(r'[0-9a-f]{16}_v\d+')
+
+def diretorio_cache():
+    """Diretório do cache colunar (configurável pela variável TBCA_CACHE_DIR)"""
+    return os.environ.get('TBCA_CACHE_DIR', os.path.join(DATA_DIR, '.tbca_cache'))
+
+def hash_arquivo(caminho):
+    """Calcula o SHA-256 do arquivo lendo-o em blocos"""
+    sha256 = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(1 << 20), b''):
+            sha256.update(bloco)
+    return sha256.hexdigest()
+
+def assinatura_arquivo(caminho, calcular_hash=False):
+    """Identifica a versão de um arquivo pelo mtime, tamanho e (opcionalmente) hash"""
+    info = os.stat(caminho)
+    assinatura = {'mtime_ns': info.st_mtime_ns, 'tamanho': info.st_size}
+    if calcular_hash:
+        assinatura['sha256'] = hash_arquivo(caminho)
+    return assinatura
+
+def empacotar_textos(serie):
+    """Concatena os textos de uma coluna em um único buffer, com offsets e máscara de nulos"""
+    nulos = serie.isna().to_numpy(dtype=bool)
+    textos = ['' if nulo else str(valor) for valor, nulo in zip(serie.tolist(), nulos)]
+    offsets = np.zeros(len(textos) + 1, dtype=np.int64)
+    np.cumsum([len(texto) for texto in textos], out=offsets[1:])
+    return ''.join(textos), offsets, nulos
+
+def desempacotar_textos(buffer, offsets, nulos):
+    """Reconstrói a lista de textos a partir do buffer concatenado"""
+    return [None if nulo else buffer[inicio:fim]
+            for inicio, fim, nulo in zip(offsets[:-1].tolist(), offsets[1:].tolist(), nulos.tolist())]
+
+def _gravar_manifesto(base, manifesto):
+    """Grava o manifesto de forma atômica (arquivo temporário + rename)"""
+    temporario = os.path.join(base, f'manifesto.json.{os.getpid()}.tmp')
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(manifesto, f, ensure_ascii=False)
+    os.replace(temporario, os.path.join(base, 'manifesto.json'))
+
+def salvar_cache_colunar(df, arquivo_json):
+    """Grava a tabela normalizada em formato colunar, para as próximas inicializações"""
+    base = diretorio_cache()
+    temporario = None
+    try:
+        origem = assinatura_arquivo(arquivo_json, calcular_hash=True)
+        # O nome inclui a versão do formato: um diretório com o mesmo conteúdo em
+        # outro formato nunca é reaproveitado
+        subdiretorio = f"{origem['sha256'][:16]}_v{VERSAO_CACHE}"
+        destino = os.path.join(base, subdiretorio)
+        
+        # Os arquivos são gravados em um diretório próprio do processo e só depois
+        # renomeados para o destino: arquivos já mapeados por outros workers nunca
+        # são sobrescritos
+        temporario = f'{destino}.{os.getpid()}.tmp'
+        shutil.rmtree(temporario, ignore_errors=True)
+        os.makedirs(temporario)
+        
+        colunas = []
+        for i, col in enumerate(df.columns):
+            serie = df[col]
+            prefixo = os.path.join(temporario, f'coluna_{i}')
+            if isinstance(serie.dtype, pd.CategoricalDtype):
+                # Códigos inteiros (memory-map) e os valores distintos como texto
+                np.save(prefixo + '_codigos.npy', serie.cat.codes.to_numpy())
+                buffer, offsets, nulos = empacotar_textos(pd.Series(serie.cat.categories))
+                np.save(prefixo + '_buffer.npy', np.frombuffer(buffer.encode('utf-8'), dtype=np.uint8))
+                np.save(prefixo + '_offsets.npy', offsets)
+                np.save(prefixo + '_nulos.npy', nulos)
+                colunas.append({'nome': col, 'tipo': 'categoria'})
+            elif pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie):
+                np.save(prefixo + '.npy', serie.to_numpy())
+                colunas.append({'nome': col, 'tipo': 'numero'})
+            else:
+                buffer, offsets, nulos = empacotar_textos(serie)
+                np.save(prefixo + '_buffer.npy', np.frombuffer(buffer.encode('utf-8'), dtype=np.uint8))
+                np.save(prefixo + '_offsets.npy', offsets)
+                np.save(prefixo + '_nulos.npy', nulos)
+                colunas.append({'nome': col, 'tipo': 'texto'})
+        
+        # Outro processo pode já ter publicado o mesmo conteúdo: mantém o dele
+        try:
+            os.rename(temporario, destino)
+        except OSError:
+            if not os.path.isdir(destino):
+                raise
+            shutil.rmtree(temporario, ignore_errors=True)
+        temporario = None
+        
+        _gravar_manifesto(base, {
+            'versao': VERSAO_CACHE,
+            'origem': origem,
+            'diretorio': subdiretorio,
+            'linhas': len(df),
+            'colunas': colunas,
+        })
+        
+        # Remove versões antigas do cache (arquivos já mapeados continuam válidos no POSIX);
+        # diretórios temporários em gravação e qualquer outro conteúdo de TBCA_CACHE_DIR ficam
+        for nome in os.listdir(base):
+            caminho = os.path.join(base, nome)
+            if (nome != subdiretorio and PADRAO_DIRETORIO_CACHE.fullmatch(nome)
+                    and os.path.isdir(caminho)):
+                shutil.rmtree(caminho, ignore_errors=True)
+        
+        print(f"Cache colunar gravado em: {destino}")
+    except OSError as e:
+        print(f"Não foi possível gravar o cache colunar em {base}: {e}")
+        if temporario is not None:
+            shutil.rmtree(temporario, ignore_errors=True)
+
+def carregar_cache_colunar(arquivo_json):
+    """Carrega a tabela do cache colunar (None se ausente ou desatualizado)"""
+    base = diretorio_cache()
+    caminho_manifesto = os.path.join(base, 'manifesto.json')
+    if not os.path.exists(caminho_manifesto):
+        return None
+    try:
+        with open(caminho_manifesto, 'r', encoding='utf-8') as f:
+            manifesto = json.load(f)
+        if manifesto.get('versao') != VERSAO_CACHE:
+            return None
+        
+        origem = manifesto['origem']
+        atual = assinatura_arquivo(arquivo_json)
+        if atual['tamanho'] != origem['tamanho']:
+            return None
+        if atual['mtime_ns'] != origem['mtime_ns']:
+            # O arquivo pode ter sido apenas tocado: confere o conteúdo pelo hash
+            if hash_arquivo(arquivo_json) != origem['sha256']:
+                return None
+            origem['mtime_ns'] = atual['mtime_ns']
+            _gravar_manifesto(base, manifesto)
+        
+        destino = os.path.join(base, manifesto['diretorio'])
+        colunas = {}
+        for i, coluna in enumerate(manifesto['colunas']):
+            prefixo = os.path.join(destino, f'coluna_{i}')
+            if coluna['tipo'] == 'numero':
+                colunas[coluna['nome']] = np.load(prefixo + '.npy', mmap_mode='r')
+            elif coluna['tipo'] == 'categoria':
+                buffer = np.load(prefixo + '_buffer.npy', mmap_mode='r').tobytes().decode('utf-8')
+                valores = desempacotar_textos(buffer, np.load(prefixo + '_offsets.npy'), np.load(prefixo + '_nulos.npy'))
+                codigos = np.load(prefixo + '_codigos.npy', mmap_mode='r')
+                colunas[coluna['nome']] = pd.Categorical.from_codes(codigos, categories=pd.Index(valores))
+            else:
+                buffer = np.load(prefixo + '_buffer.npy', mmap_mode='r').tobytes().decode('utf-8')
+                offsets = np.load(prefixo + '_offsets.npy')
+                nulos = np.load(prefixo + '_nulos.npy')
+                colunas[coluna['nome']] = pd.Series(desempacotar_textos(buffer, offsets, nulos))
+        
+        df = pd.DataFrame(colunas, copy=False)
+        return df if len(df) == manifesto['linhas'] else None
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Cache colunar indisponível ({e}); os dados serão lidos do JSON")
+        return None
+
+# Nutrientes com nomes alternativos no JSON, em ordem de prioridade
+# (os demais nutrientes usam o próprio nome normalizado)
+ALIASES_NUTRIENTES = {
+    'energia_kcal': ['energia', 'kcal', 'energia_kcal', 'calorias'],
+    'energia_kj': ['energia_kj', 'kj'],
+    'proteina': ['proteina', 'proteinas', 'protein'],
+    'lipideos': ['lipideos', 'lipídeos', 'gorduras', 'fat'],
+    'carboidratos': ['carboidratos', 'carboidrato', 'carbohydrates'],
+    'fibra': ['fibra', 'fibras', 'fiber'],
+    'calcio': ['calcio', 'cálcio', 'calcium'],
+    'ferro': ['ferro', 'iron']
+}
+
+# Valores que indicam traço (quantidade não quantificável), tratados como zero
+VALORES_TRACO = ['tr', 'traço', 'traco']
+
+# Valores que indicam nutriente não analisado ou não disponível
+VALORES_AUSENTES = ['', '-', '--', 'na', 'nd', 'n/d', '*']
+
+# Número com unidade opcional, depois de trocar a vírgula decimal por ponto
+PADRAO_VALOR_NUTRIENTE = r'^([-+]?(?:\d+\.?\d*|\.\d+)(?:e[-+]?\d+)?)\s*(?:kcal|kj|mg|mcg|µg|ug|g)?$'
+
+def normalizar_chave(chave):
+    """Normaliza o nome de um nutriente: minúsculas, sem acentos e com '_' como separador"""
+    sem_acentos = unicodedata.normalize('NFKD', str(chave)).encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^a-z0-9]+', '_', sem_acentos.lower()).strip('_')
+
+# Tabela alias normalizado -> (nutriente canônico, prioridade), montada uma única vez
+TABELA_ALIASES = {}
+for _nutriente, _aliases in ALIASES_NUTRIENTES.items():
+    for _prioridade, _alias in enumerate(_aliases):
+        TABELA_ALIASES.setdefault(normalizar_chave(_alias), (_nutriente, _prioridade))
+
+def resolver_nutriente(chave):
+    """Retorna o nome canônico e a prioridade de uma chave de nutriente do JSON"""
+    normalizada = normalizar_chave(chave)
+    return TABELA_ALIASES.get(normalizada, (normalizada, 0))
+
+def converter_valores_nutrientes(brutos):
+    """
+    Converte valores brutos de nutrientes ("1,5 g", "tr", "NA") em um array float
+
+    Os valores se repetem muito na TBCA, então só os distintos são convertidos.
+    """
+    codigos, distintos = pd.factorize(np.asarray(brutos, dtype=object))
+    eh_texto = np.fromiter((type(valor) is str for valor in distintos), dtype=bool, count=len(distintos))
+    
+    valores = np.full(len(distintos), np.nan)
+    valores[~eh_texto] = pd.to_numeric(distintos[~eh_texto], errors='coerce')
+    
+    textos = distintos[eh_texto].tolist()
+    if textos:
+        # Minúsculas e vírgula decimal em uma única operação sobre todos os textos
+        normalizados = '\n'.join(textos).lower().replace(',', '.').split('\n')
+        if len(normalizados) != len(textos):
+            normalizados = [texto.lower().replace(',', '.') for texto in textos]
+        normalizados = pd.Series(normalizados, dtype=object)
+        convertidos = pd.to_numeric(normalizados, errors='coerce')
+        
+        # Valores com unidade, traços e marcadores de ausência
+        restantes = normalizados[convertidos.isna()].str.strip()
+        if not restantes.empty:
+            extraidos = pd.to_numeric(restantes.str.extract(PADRAO_VALOR_NUTRIENTE, expand=False), errors='coerce')
+            extraidos.loc[restantes.isin(VALORES_TRACO)] = 0.0
+            extraidos.loc[restantes.isin(VALORES_AUSENTES)] = np.nan
+            convertidos.loc[extraidos.index] = extraidos
+        valores[eh_texto] = convertidos.to_numpy(dtype=float)
+    
+    # Código -1 indica valor ausente (None/NaN)
+    return np.append(valores, np.nan)[codigos]
+
+# Tamanho (em caracteres) de cada leitura do arquivo JSON na carga incremental
+TAMANHO_BLOCO_JSON = 1 << 20
+
+# Quantidade de alimentos cujos nutrientes são convertidos juntos, em lote
+TAMANHO_BLOCO_NUTRIENTES = 10000
+
+# Espaços aceitos entre os elementos de um JSON
+ESPACOS_JSON = ' \t\r\n'
+
+def primeiro_caractere_json(arquivo_json):
+    """Primeiro caractere do arquivo que não é espaço ('' se o arquivo estiver vazio)"""
+    with open(arquivo_json, 'r', encoding='utf-8') as f:
+        while True:
+            bloco = f.read(4096)
+            if not bloco:
+                return ''
+            texto = bloco.lstrip()
+            if texto:
+                return texto[0]
+
+def iterar_alimentos_json(arquivo_json, tamanho_bloco=TAMANHO_BLOCO_JSON):
+    """Percorre os itens da lista principal do arquivo JSON, um de cada vez"""
+    decodificador = json.JSONDecoder()
+    with open(arquivo_json, 'r', encoding='utf-8') as f:
+        buffer = ''
+        while not buffer:
+            bloco = f.read(tamanho_bloco)
+            if not bloco:
+                break
+            buffer = bloco.lstrip()
+        if not buffer.startswith('['):
+            raise ValueError('O arquivo JSON não contém uma lista de alimentos')
+        posicao = 1
+        fim_arquivo = False
+        # Depois de um item só pode vir ',' ou ']'; depois de ',', outro item
+        depois_item = False
+        primeiro = True
+        while True:
+            while posicao < len(buffer) and buffer[posicao] in ESPACOS_JSON:
+                posicao += 1
+            
+            if posicao < len(buffer):
+                caractere = buffer[posicao]
+                if depois_item:
+                    if caractere == ']':
+                        break
+                    if caractere != ',':
+                        raise ValueError(f"JSON inválido: esperado ',' ou ']' entre os alimentos, encontrado {caractere!r}")
+                    depois_item = False
+                    primeiro = False
+                    posicao += 1
+                    continue
+                if caractere == ']' and primeiro:
+                    break
+                
+                item = None
+                try:
+                    item, fim = decodificador.raw_decode(buffer, posicao)
+                except json.JSONDecodeError:
+                    if fim_arquivo:
+                        raise
+                # Um item que termina no fim do buffer pode estar incompleto (ex.: número)
+                if item is not None and (fim < len(buffer) or fim_arquivo):
+                    yield item
+                    posicao = fim
+                    depois_item = True
+                    continue
+            
+            if fim_arquivo:
+                raise ValueError('Arquivo JSON incompleto: a lista de alimentos não foi fechada')
+            # Item incompleto: descarta o que já foi lido e completa o buffer
+            bloco = f.read(tamanho_bloco)
+            fim_arquivo = not bloco
+            buffer = buffer[posicao:] + bloco
+            posicao = 0
+        
+        # Depois da lista só pode haver espaços
+        resto = buffer[posicao + 1:]
+        while resto:
+            if resto.strip(ESPACOS_JSON):
+                raise ValueError('JSON inválido: há conteúdo depois da lista de alimentos')
+            resto = f.read(tamanho_bloco)
+
+class ColunasNutrientes:
+    """Colunas de nutrientes montadas à medida que os alimentos são lidos"""
+
+    def __init__(self, tamanho_bloco=TAMANHO_BLOCO_NUTRIENTES):
+        self.tamanho_bloco = tamanho_bloco
+        self.total = 0
+        self.colunas = {}
+        self._planos = {}
+        self._bloco = []
+
+    def _planejar(self, chaves):
+        """Escolhe, para cada nutriente, a chave de maior prioridade entre as chaves dadas"""
+        escolhidas = {}
+        for chave in chaves:
+            nutriente, prioridade = resolver_nutriente(chave)
+            # Vale a chave de maior prioridade, mesmo que o valor dela seja inválido
+            if nutriente not in escolhidas or prioridade < escolhidas[nutriente][0]:
+                escolhidas[nutriente] = (prioridade, chave)
+        return {nutriente: chave for nutriente, (_, chave) in escolhidas.items()}
+
+    def adicionar(self, nutrientes):
+        """Acrescenta os nutrientes de um alimento (dicionário do JSON)"""
+        # Os alimentos quase sempre compartilham o mesmo conjunto de chaves
+        chaves = tuple(nutrientes)
+        plano = self._planos.get(chaves)
+        if plano is None:
+            plano = self._planos[chaves] = self._planejar(chaves)
+        self._bloco.append((plano, nutrientes))
+        if len(self._bloco) >= self.tamanho_bloco:
+            self._converter_bloco()
+
+    def _converter_bloco(self):
+        """Converte os valores brutos do bloco atual e os acrescenta às colunas"""
+        bloco, self._bloco = self._bloco, []
+        if not bloco:
+            return
+        
+        # Nutrientes que aparecem pela primeira vez começam com NaN nos alimentos anteriores
+        planos = {id(plano): plano for plano, _ in bloco}
+        for plano in planos.values():
+            for nutriente in plano:
+                if nutriente not in self.colunas:
+                    self.colunas[nutriente] = [np.full(self.total, np.nan)]
+        
+        brutos = []
+        for nutriente in self.colunas:
+            brutos.extend([valores[plano[nutriente]] if nutriente in plano else None for plano, valores in bloco])
+        try:
+            matriz = converter_valores_nutrientes(brutos)
+        except TypeError:
+            # Formato {"valor": ..., "unidade": ...} (dicionários não são hashable)
+            matriz = converter_valores_nutrientes([valor.get('valor') if isinstance(valor, dict) else valor for valor in brutos])
+        matriz = matriz.reshape(len(self.colunas), len(bloco))
+        
+        for i, partes in enumerate(self.colunas.values()):
+            partes.append(matriz[i])
+        self.total += len(bloco)
+
+    def tabela(self):
+        """Tabela de nutrientes (uma coluna por nutriente) de todos os alimentos adicionados"""
+        self._converter_bloco()
+        
+        # Nutrientes conhecidos primeiro, na ordem do mapeamento; depois os demais
+        nutrientes = [n for n in ALIASES_NUTRIENTES if n in self.colunas]
+        nutrientes += [n for n in self.colunas if n not in ALIASES_NUTRIENTES]
+        
+        colunas = {}
+        for nutriente in nutrientes:
+            valores = np.concatenate(self.colunas.pop(nutriente))
+            if not np.isnan(valores).all():
+                colunas[nutriente] = valores
+        return pd.DataFrame(colunas, index=range(self.total))
+
+def coluna_categorica(codigos, valores):
+    """Monta uma coluna categórica (categorias em ordem) a partir dos códigos e dos valores distintos"""
+    categorias, posicoes = np.unique(np.asarray(valores, dtype=object), return_inverse=True)
+    codigos = np.asarray(codigos, dtype=np.int32)
+    return pd.Categorical.from_codes(np.where(codigos >= 0, posicoes[codigos], -1), categorias)
+
+def processar_json(arquivo_json):
+    """Lê o arquivo JSON da TBCA e normaliza os alimentos em uma tabela"""
+    # Processa os dados JSON (é uma lista de alimentos)
+    if primeiro_caractere_json(arquivo_json) != '[':
+        # Formato de dados JSON não reconhecido
+        return None
+    
+    textos = {campo: [] for campo in ('codigo', 'nome', 'nome_cientifico', 'marca')}
+    grupos = {}
+    codigos_grupo = []
+    nutrientes = ColunasNutrientes()
+    for alimento in iterar_alimentos_json(arquivo_json):
+        for campo, valores in textos.items():
+            valores.append(alimento.get(campo, ''))
+        grupo = alimento.get('grupo', '')
+        codigos_grupo.append(-1 if grupo is None else grupos.setdefault(grupo, len(grupos)))
+        nutrientes.adicionar(alimento.get('nutrientes') or {})
+    
+    # Grupo e categoria (grupo normalizado) são categóricos
+    nomes_grupos = list(grupos)
+    normalizados = [str(grupo).lower().replace(' ', '_') for grupo in nomes_grupos]
+    df = pd.DataFrame({
+        'codigo': textos['codigo'],
+        'alimento': textos['nome'],
+        'nome': textos['nome'],
+        'nome_cientifico': textos['nome_cientifico'],
+        'grupo': coluna_categorica(codigos_grupo, nomes_grupos),
+        'marca': textos['marca'],
+        'categoria': coluna_categorica(codigos_grupo, normalizados),
+    })
+    del textos, codigos_grupo
+    
+    nutrientes = nutrientes.tabela()
+    if not nutrientes.empty:
+        df = pd.concat([df, nutrientes], axis=1)
     
+    # Garante que temos pelo menos a coluna energia
+    if 'energia' not in df.columns and 'energia_kcal' in df.columns:
+        df['energia'] = df['energia_kcal']
+    
+    return df
+
+def ler_dados():
+    """
+    Carrega todos os dados do arquivo JSON principal (tbca_dados_completos.json)
+    """
     # Carrega dados do arquivo JSON principal
     arquivo_json = os.path.join(DATA_DIR, 'tbca_dados_completos.json')
     
     if os.path.exists(arquivo_json):
         try:
-            print(f"Carregando dados do arquivo JSON: {arquivo_json}")
-            
-            with open(arquivo_json, 'r', encoding='utf-8') as f:
-                dados_json = json.load(f)
-            
-            # Processa os dados JSON (é uma lista de alimentos)
-            if isinstance(dados_json, list):
-                alimentos_processados = []
-                
-                for alimento in dados_json:
-                    # Extrai informações básicas
-                    item = {
-                        'codigo': alimento.get('codigo', ''),
-                        'alimento': alimento.get('nome', ''),
-                        'nome': alimento.get('nome', ''),
-                        'nome_cientifico': alimento.get('nome_cientifico', ''),
-                        'grupo': alimento.get('grupo', ''),
-                        'marca': alimento.get('marca', ''),
-                        'categoria': alimento.get('grupo', '').lower().replace(' ', '_')
-                    }
-                    
-                    # Processa nutrientes se existirem
-                    nutrientes = alimento.get('nutrientes', {})
-                    if nutrientes:
-                        # Mapeia nutrientes comuns
-                        mapeamento_nutrientes = {
-                            'energia_kcal': ['energia', 'kcal', 'energia_kcal', 'calorias'],
-                            'energia_kj': ['energia_kj', 'kj'],
-                            'proteina': ['proteina', 'proteinas', 'protein'],
-                            'lipideos': ['lipideos', 'lipídeos', 'gorduras', 'fat'],
-                            'carboidratos': ['carboidratos', 'carboidrato', 'carbohydrates'],
-                            'fibra': ['fibra', 'fibras', 'fiber'],
-                            'calcio': ['calcio', 'cálcio', 'calcium'],
-                            'ferro': ['ferro', 'iron']
-                        }
-                        
-                        for nutriente_nome, possiveis_chaves in mapeamento_nutrientes.items():
-                            for chave in possiveis_chaves:
-                                if chave in nutrientes:
-                                    valor = nutrientes[chave]
-                                    # Tenta converter para número
-                                    try:
-                                        if isinstance(valor, str):
-                                            # Remove unidades e caracteres especiais
-                                            valor_limpo = valor.replace(',', '.').replace('g', '').replace('mg', '').replace('kcal', '').replace('kJ', '').strip()
-                                            if valor_limpo and valor_limpo != 'tr' and valor_limpo != '-':
-                                                item[nutriente_nome] = float(valor_limpo)
-                                        else:
-                                            item[nutriente_nome] = float(valor)
-                                    except (ValueError, TypeError):
-                                        pass
-                                    break
-                    
-                    alimentos_processados.append(item)
-                
-                df = pd.DataFrame(alimentos_processados)
-                
-                # Garante que temos pelo menos a coluna energia
-                if 'energia' not in df.columns and 'energia_kcal' in df.columns:
-                    df['energia'] = df['energia_kcal']
-                
+            # Usa o cache colunar quando ele corresponde ao arquivo JSON atual
+            df = carregar_cache_colunar(arquivo_json)
+            if df is not None:
+                print(f"Carregando dados do cache colunar: {diretorio_cache()}")
             else:
-                print(f"Formato de dados JSON não reconhecido")
-                return pd.DataFrame()
-            
-            # Se uma categoria específica foi solicitada, filtra os dados
-            if categoria:
-                if 'categoria' in df.columns:
-                    df_filtrado = df[df['categoria'].str.contains(categoria.replace('_', ' '), case=False, na=False)]
-                    if not df_filtrado.empty:
-                        df = df_filtrado
-                elif 'grupo' in df.columns:
-                    df_filtrado = df[df['grupo'].str.contains(categoria.replace('_', ' '), case=False, na=False)]
-                    if not df_filtrado.empty:
-                        df = df_filtrado
+                print(f"Carregando dados do arquivo JSON: {arquivo_json}")
+                df = processar_json(arquivo_json)
+                if df is None:
+                    print(f"Formato de dados JSON não reconhecido")
+                    return ler_dados_csv()
+                salvar_cache_colunar(df, arquivo_json)
             
             print(f"Dados carregados com sucesso:")
             print(f"   - Total de registros: {len(df)}")
@@ -133,90 +1616,215 @@ def carregar_dados(categoria=None):
                 if nutrientes_disponiveis:
                     print(f"   - Nutrientes disponíveis: {nutrientes_disponiveis}")
             
-            # Salva no cache
-            dados_cache[cache_key] = df
             return df
             
         except Exception as e:
             print(f"Erro ao carregar arquivo JSON {arquivo_json}: {e}")
             import traceback
             traceback.print_exc()
-            return pd.DataFrame()
+            return ler_dados_csv()
     
     else:
         print(f"Arquivo JSON não encontrado: {arquivo_json}")
         # Fallback para arquivos CSV se JSON não existir
-        return carregar_dados_csv(categoria)
+        return ler_dados_csv()
 
-def carregar_dados_csv(categoria=None):
-    """
-    Método de fallback para carregar dados de arquivos CSV
-    """
-    # Garantir que as categorias estejam carregadas
-    categorias = carregar_categorias()
+def arquivo_categoria(categoria):
+    """Caminho do arquivo CSV de uma categoria"""
+    return os.path.join(DATA_DIR, f'alimentos_{categoria}.csv')
+
+def ler_csv_categoria(categoria):
+    """Lê o arquivo CSV de uma categoria, com as colunas numéricas convertidas"""
+    df = pd.read_csv(arquivo_categoria(categoria), encoding='utf-8', dtype=str)
+    if 'nome' in df.columns and 'alimento' not in df.columns:
+        df = df.rename(columns={'nome': 'alimento'})
+    
+    textos = {}
+    numericas = []
+    for coluna in df.columns:
+        if coluna in COLUNAS_TEXTO_CSV:
+            textos[coluna] = df[coluna]
+            continue
+        brutos = df[coluna]
+        valores = converter_valores_nutrientes(brutos.to_numpy(dtype=object, na_value=None))
+        ausentes = brutos.isna() | brutos.str.strip().str.lower().isin(VALORES_AUSENTES)
+        if np.isnan(valores).all() or (np.isnan(valores) & ~ausentes.to_numpy()).any():
+            textos[coluna] = brutos
+        else:
+            numericas.append((coluna, valores))
     
-    if categoria and categoria in categorias:
-        arquivo = os.path.join(DATA_DIR, f'alimentos_{categoria}.csv')
-        if os.path.exists(arquivo):
+    # Colunas numéricas ficam com o nome canônico do nutriente, para que todos os
+    # arquivos tenham uma única coluna por nutriente ('Energia' e 'kcal' -> 'energia_kcal');
+    # nomes repetidos no mesmo arquivo são preenchidos pela coluna de maior prioridade
+    nutrientes = {}
+    for coluna, valores in numericas:
+        nome, prioridade = resolver_nutriente(coluna)
+        if nome in textos:
+            # O nome canônico já é de uma coluna de texto: mantém o nome do arquivo
+            nome = coluna
+        anterior = nutrientes.get(nome)
+        if anterior is None:
+            nutrientes[nome] = (prioridade, valores)
+        else:
+            primeira, segunda = sorted([anterior, (prioridade, valores)], key=lambda item: item[0])
+            nutrientes[nome] = (primeira[0], np.where(np.isnan(primeira[1]), segunda[1], primeira[1]))
+    
+    df = pd.DataFrame({**textos, **{nome: valores for nome, (_, valores) in nutrientes.items()}},
+                      index=df.index)
+    # A categoria é a do arquivo
+    df['categoria'] = categoria
+    return df
+
+def ler_dados_csv():
+    """Carrega os arquivos CSV de todas as categorias em uma única tabela"""
+    categorias = sorted(listar_categorias())
+    if not categorias:
+        return pd.DataFrame()
+    
+    tabelas = []
+    with ThreadPoolExecutor(max_workers=min(LEITORES_CSV, len(categorias))) as executor:
+        for categoria, futuro in [(c, executor.submit(ler_csv_categoria, c)) for c in categorias]:
             try:
-                df = pd.read_csv(arquivo, encoding='utf-8', low_memory=False)
-                if 'nome' in df.columns:
-                    df = df.rename(columns={'nome': 'alimento'})
-                if 'categoria' not in df.columns:
-                    df['categoria'] = categoria
-                return df
+                tabelas.append(futuro.result())
             except Exception as e:
-                print(f"Erro ao carregar arquivo CSV {arquivo}: {e}")
-                return pd.DataFrame()
+                print(f"Erro ao carregar arquivo CSV {arquivo_categoria(categoria)}: {e}")
+    if not tabelas:
+        return pd.DataFrame()
+    
+    df = pd.concat(tabelas, ignore_index=True)
+    if 'energia' not in df.columns and 'energia_kcal' in df.columns:
+        df['energia'] = df['energia_kcal']
     
-    return pd.DataFrame()  # Retorna DataFrame vazio se não encontrar dados
+    # Arquivos sem a coluna de código: os alimentos recebem '<categoria>-<n>' (n na ordem do arquivo)
+    coluna_codigo = next((col for col in ('codigo', 'id') if col in df.columns), None)
+    if coluna_codigo is not None and df[coluna_codigo].isna().any():
+        sem_codigo = df[coluna_codigo].isna()
+        numeros = df[sem_codigo].groupby('categoria', sort=False).cumcount() + 1
+        df.loc[sem_codigo, coluna_codigo] = df.loc[sem_codigo, 'categoria'] + '-' + numeros.astype(str)
+    df['categoria'] = df['categoria'].astype('category')
+    print(f"Dados carregados de {len(tabelas)} arquivos CSV: {len(df)} registros")
+    return df
 
-@app.route('/')
-def index():
-    """Página inicial"""
-    categorias = carregar_categorias()
-    return render_template('index.html', categorias=categorias)
+# Paginação dos resultados da página de busca
+POR_PAGINA = 50
+POR_PAGINA_MAXIMO = 500
 
-@app.route('/buscar', methods=['GET', 'POST'])
-def buscar():
-    """Endpoint para buscar alimentos"""
-    categorias = carregar_categorias()
-    
-    if request.method == 'POST':
-        termo_busca = request.form.get('termo', '')
-        categoria = request.form.get('categoria', '')
-        # Novos parâmetros de filtro
-        busca_exata = request.form.get('exatamente') == '1'
-        min_energia = request.form.get('minEnergia', '')
-        max_energia = request.form.get('maxEnergia', '')
-        min_proteina = request.form.get('minProteina', '')
-        max_proteina = request.form.get('maxProteina', '')
-        min_carboidrato = request.form.get('minCarboidrato', '')
-        max_carboidrato = request.form.get('maxCarboidrato', '')
-        min_lipideos = request.form.get('minLipideos', '')
-        max_lipideos = request.form.get('maxLipideos', '')
-        ordenar = request.form.get('ordenar', 'relevancia')
+# Quantidade máxima de códigos por requisição da API de lote
+LOTE_MAXIMO = 500
+
+# Quantidade padrão e máxima de sugestões do autocompletar, e por quanto tempo
+# (em segundos) o navegador e os proxies podem reaproveitá-las
+SUGESTOES_PADRAO = 8
+SUGESTOES_MAXIMO = 20
+SUGESTOES_MAX_AGE = 300
+
+# Filtros de faixa de nutrientes: parâmetros min<Nutriente> e max<Nutriente>
+PADRAO_FAIXA = re.compile(r'^(min|max)(.+)$')
+
+# Faixas que pegam até esta fração dos candidatos saem do índice ordenado do
+# nutriente (busca binária) em vez de comparar todos os candidatos
+FRACAO_INDICE_FAIXA = 0.05
+
+def selecionar_pagina(chaves, inicio, quantidade):
+    """
+    Índices das posições [inicio, inicio + quantidade) na ordem crescente das chaves
+
+    Usa seleção parcial: só os primeiros inicio + quantidade elementos são ordenados.
+    """
+    fim = min(inicio + quantidade, len(chaves))
+    if inicio >= fim:
+        return np.empty(0, dtype=np.intp)
+    if fim < len(chaves):
+        primeiros = np.argpartition(chaves, fim - 1)[:fim]
     else:
-        termo_busca = request.args.get('termo', '')
-        categoria = request.args.get('categoria', '')
-        # Novos parâmetros de filtro
-        busca_exata = request.args.get('exatamente') == '1'
-        min_energia = request.args.get('minEnergia', '')
-        max_energia = request.args.get('maxEnergia', '')
-        min_proteina = request.args.get('minProteina', '')
-        max_proteina = request.args.get('maxProteina', '')
-        min_carboidrato = request.args.get('minCarboidrato', '')
-        max_carboidrato = request.args.get('maxCarboidrato', '')
-        min_lipideos = request.args.get('minLipideos', '')
-        max_lipideos = request.args.get('maxLipideos', '')
-        ordenar = request.args.get('ordenar', 'relevancia')
+        primeiros = np.arange(len(chaves))
+    return primeiros[np.argsort(chaves[primeiros])][inicio:fim]
+
+def buscar_relevantes(dados, termos, busca_exata=False):
+    """Posições (na visão) e relevância das linhas com alguma relevância para os termos"""
+    if not dados.colunas_busca:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.int64)
     
-    # Carrega os dados da categoria selecionada ou todos os dados
-    df = carregar_dados(categoria if categoria else None)
+    # Pontuação local da requisição para classificar os resultados por relevância
+    # (correspondência exata tem peso maior que correspondência parcial)
+    relevancia = dados.pontuar(termos, busca_exata)
+    
+    # Se não houver resultados exatos e não for busca exata, tenta busca mais flexível
+    if not relevancia.any() and not busca_exata:
+        relevancia = dados.pontuar_aproximado(termos)
+    
+    # Mantém apenas resultados com alguma relevância
+    locais = np.flatnonzero(relevancia > 0)
+    return locais, relevancia[locais]
+
+def converter_limite(valor):
+    """Converte um limite de filtro recebido na requisição (None se vazio ou inválido)"""
+    try:
+        limite = float(str(valor).strip().replace(',', '.'))
+    except ValueError:
+        return None
+    return limite if np.isfinite(limite) else None
+
+def ler_faixas_nutrientes(parametros):
+    """Lê os filtros min<Nutriente> e max<Nutriente> dos parâmetros da requisição"""
+    faixas = {}
+    for chave, valor in parametros.items():
+        encontrado = PADRAO_FAIXA.match(chave)
+        limite = converter_limite(valor) if encontrado else None
+        if limite is None:
+            continue
+        nutriente = resolver_nutriente(encontrado.group(2))[0]
+        minimo, maximo = faixas.get(nutriente, (None, None))
+        if encontrado.group(1) == 'min':
+            minimo = limite
+        else:
+            maximo = limite
+        faixas[nutriente] = (minimo, maximo)
+    return faixas
+
+def filtrar_faixas(dados, posicoes, faixas):
+    """
+    Índices (em posicoes) dos resultados dentro de todas as faixas, ou None
+
+    A faixa mais seletiva usa o índice ordenado; as demais viram uma máscara.
+    """
+    ativas = []
+    for nutriente, (minimo, maximo) in faixas.items():
+        coluna = dados.colunas_nutrientes.get(nutriente)
+        if coluna is None or (minimo is None and maximo is None):
+            continue
+        ordem, ordenados = dados.indice_ordenado(coluna)
+        inicio = 0 if minimo is None else np.searchsorted(ordenados, np.float32(minimo), 'left')
+        fim = np.searchsorted(ordenados, np.float32(np.inf if maximo is None else maximo), 'right')
+        ativas.append((fim - inicio, coluna, minimo, maximo, ordem[inicio:fim]))
+    if not ativas:
+        return None
+    ativas.sort(key=lambda faixa: faixa[0])
     
-    if df.empty:
-        return render_template('resultados.html', resultados=[], termo=termo_busca, categorias=categorias)
+    if ativas[0][0] <= FRACAO_INDICE_FAIXA * len(posicoes):
+        # Linhas da faixa mais seletiva que também estão entre os candidatos
+        linhas = np.sort(ativas[0][4])
+        indices = np.searchsorted(posicoes, linhas)
+        encontrados = indices < len(posicoes)
+        indices = indices[encontrados]
+        indices = indices[posicoes[indices] == linhas[encontrados]]
+        ativas = ativas[1:]
+    else:
+        indices = np.arange(len(posicoes))
     
+    candidatos = posicoes[indices]
+    mascara = np.ones(len(candidatos), dtype=bool)
+    for _, coluna, minimo, maximo, _ in ativas:
+        valores = dados.valores(coluna)[candidatos]
+        if minimo is not None:
+            mascara &= valores >= np.float32(minimo)
+        if maximo is not None:
+            mascara &= valores <= np.float32(maximo)
+    return indices[mascara]
+
+def executar_busca(dados, termo_busca, busca_exata, ordenar, faixas=None,
+                   inicio=0, quantidade=POR_PAGINA):
+    """Pontua, filtra e ordena os alimentos para a página de resultados"""
     # Realiza a busca pelo termo em várias colunas
     if termo_busca:
         # Divide o termo de busca em palavras individuais para busca mais precisa
@@ -224,241 +1832,428 @@ def buscar():
             termos = [termo_busca.lower()]
         else:
             termos = termo_busca.lower().split()
-        
-        # Verifica quais colunas estão disponíveis para busca
-        colunas_busca = ['alimento', 'nome', 'descricao', 'nomeIngles', 'nomeCientifico'] 
-        colunas_busca = [col for col in colunas_busca if col in df.columns]
-        
-        # Criar coluna de pontuação para classificar os resultados por relevância
-        df['relevancia'] = 0
-        
-        if colunas_busca:
-            # Atribui pesos para diferentes tipos de correspondência
-            # Correspondência exata tem peso maior que correspondência parcial
-            for termo in termos:
-                for col in colunas_busca:
-                    if col in df.columns:
-                        # Correspondência exata (termo completo)
-                        mask_exata = df[col].str.lower().str.contains(rf'\b{termo}\b', regex=True, case=False, na=False)
-                        df.loc[mask_exata, 'relevancia'] += 10
-                        
-                        # Se não for busca exata, também considera correspondências parciais
-                        if not busca_exata:
-                            # Correspondência parcial (termo como substring)
-                            mask_parcial = df[col].str.lower().str.contains(termo, regex=False, case=False, na=False)
-                            df.loc[mask_parcial, 'relevancia'] += 5
-                            
-                            # Correspondência no início do texto (maior relevância)
-                            mask_inicio = df[col].str.lower().str.startswith(termo, na=False)
-                            df.loc[mask_inicio, 'relevancia'] += 3
-            
-            # Filtra apenas resultados com alguma relevância
-            resultados = df[df['relevancia'] > 0]
-            
-            # Se não houver resultados exatos e não for busca exata, tenta busca mais flexível
-            if resultados.empty and not busca_exata:
-                for termo in termos:
-                    # Busca com tolerância a erros (permitindo variações no termo)
-                    for col in colunas_busca:
-                        if col in df.columns:
-                            # Usa regex com padrão mais flexível
-                            pattern = ''.join(f'[{c}{c.upper()}].*?' for c in termo)
-                            mask_fuzzy = df[col].str.contains(pattern, regex=True, na=False)
-                            df.loc[mask_fuzzy, 'relevancia'] += 2
-                
-                # Filtra resultados da busca fuzzy
-                resultados = df[df['relevancia'] > 0]
-        else:
-            resultados = pd.DataFrame()
+        with metricas.etapa('pontuacao'):
+            locais, relevancia = buscar_relevantes(dados, termos, busca_exata)
     else:
-        # Se não houver termo de busca, retorna todos os resultados
-        resultados = df.copy()
-        resultados['relevancia'] = 1
-    
-    # Aplica filtros nutricionais
-    # Energia
-    if min_energia and min_energia.isdigit():
-        min_val = float(min_energia)
-        if 'energia' in resultados.columns:
-            resultados = resultados[resultados['energia'] >= min_val]
-        elif 'Energia' in resultados.columns:
-            resultados = resultados[resultados['Energia'] >= min_val]
-    
-    if max_energia and max_energia.isdigit():
-        max_val = float(max_energia)
-        if 'energia' in resultados.columns:
-            resultados = resultados[resultados['energia'] <= max_val]
-        elif 'Energia' in resultados.columns:
-            resultados = resultados[resultados['Energia'] <= max_val]
-    
-    # Proteína
-    if min_proteina:
-        try:
-            min_val = float(min_proteina)
-            if 'proteina' in resultados.columns:
-                resultados = resultados[resultados['proteina'] >= min_val]
-            elif 'Proteina' in resultados.columns:
-                resultados = resultados[resultados['Proteina'] >= min_val]
-        except ValueError:
-            pass
+        # Se não houver termo de busca, todos os alimentos são resultados
+        locais = np.arange(dados.total)
+        relevancia = np.ones(dados.total, dtype=np.int64)
+    posicoes = dados.posicoes_tabela(locais)
+    metricas.contar('linhas_avaliadas', dados.total)
     
-    if max_proteina:
-        try:
-            max_val = float(max_proteina)
-            if 'proteina' in resultados.columns:
-                resultados = resultados[resultados['proteina'] <= max_val]
-            elif 'Proteina' in resultados.columns:
-                resultados = resultados[resultados['Proteina'] <= max_val]
-        except ValueError:
-            pass
+    # Aplica os filtros de faixa de nutrientes
+    if faixas:
+        with metricas.etapa('filtro'):
+            aprovados = filtrar_faixas(dados, posicoes, faixas)
+        if aprovados is not None:
+            posicoes, relevancia = posicoes[aprovados], relevancia[aprovados]
+    metricas.contar('linhas_encontradas', len(posicoes))
     
-    # Carboidratos
-    if min_carboidrato:
-        try:
-            min_val = float(min_carboidrato)
-            if 'carboidratos' in resultados.columns:
-                resultados = resultados[resultados['carboidratos'] >= min_val]
-            elif 'Carboidratos' in resultados.columns:
-                resultados = resultados[resultados['Carboidratos'] >= min_val]
-            elif 'carboidrato' in resultados.columns:
-                resultados = resultados[resultados['carboidrato'] >= min_val]
-        except ValueError:
-            pass
+    # Seleciona apenas a página pedida, na ordem escolhida
+    with metricas.etapa('ordenacao'):
+        pagina = selecionar_pagina(dados.chaves_ordenacao(ordenar, posicoes, relevancia),
+                                   inicio, quantidade)
+    return posicoes[pagina], relevancia[pagina], len(posicoes)
+
+def executar_busca_api(dados, termo_busca, limite, inicio=0, faixas=None):
+    """Pontua e seleciona os alimentos retornados pela API"""
+    # Nenhuma página vai além do total de alimentos (offset e limite enormes viram o total)
+    inicio, limite = min(inicio, dados.total), min(limite, dados.total)
     
-    if max_carboidrato:
-        try:
-            max_val = float(max_carboidrato)
-            if 'carboidratos' in resultados.columns:
-                resultados = resultados[resultados['carboidratos'] <= max_val]
-            elif 'Carboidratos' in resultados.columns:
-                resultados = resultados[resultados['Carboidratos'] <= max_val]
-            elif 'carboidrato' in resultados.columns:
-                resultados = resultados[resultados['carboidrato'] <= max_val]
-        except ValueError:
-            pass
+    # Realiza a busca pelo termo em várias colunas
+    if termo_busca:
+        # Divide o termo de busca em palavras individuais para busca mais precisa
+        termos = termo_busca.lower().split()
+        with metricas.etapa('pontuacao'):
+            locais, relevancia = buscar_relevantes(dados, termos)
+    else:
+        # Se não houver termo de busca, retorna os alimentos na ordem da tabela
+        if not faixas:
+            locais = np.arange(inicio, min(inicio + limite, dados.total))
+            return dados.posicoes_tabela(locais), None, dados.total
+        locais, relevancia = np.arange(dados.total), None
+    posicoes = dados.posicoes_tabela(locais)
+    metricas.contar('linhas_avaliadas', dados.total)
     
-    # Lipídeos
-    if min_lipideos:
-        try:
-            min_val = float(min_lipideos)
-            if 'lipideos' in resultados.columns:
-                resultados = resultados[resultados['lipideos'] >= min_val]
-            elif 'Lipideos' in resultados.columns:
-                resultados = resultados[resultados['Lipideos'] >= min_val]
-        except ValueError:
-            pass
+    # Aplica os filtros de faixa de nutrientes
+    if faixas:
+        with metricas.etapa('filtro'):
+            aprovados = filtrar_faixas(dados, posicoes, faixas)
+        if aprovados is not None:
+            posicoes = posicoes[aprovados]
+            relevancia = relevancia[aprovados] if relevancia is not None else None
+    metricas.contar('linhas_encontradas', len(posicoes))
     
-    if max_lipideos:
+    if relevancia is None:
+        return posicoes[inicio:inicio + limite], None, len(posicoes)
+    with metricas.etapa('ordenacao'):
+        pagina = selecionar_pagina(dados.chaves_ordenacao('relevancia', posicoes, relevancia), inicio, limite)
+    return posicoes[pagina], relevancia[pagina], len(posicoes)
+
+def parametro_inteiro(valor, padrao, minimo=0, maximo=None):
+    """Converte um parâmetro inteiro da requisição, limitado ao intervalo aceito"""
+    try:
+        valor = int(valor)
+    except (TypeError, ValueError):
+        return padrao
+    valor = max(valor, minimo)
+    return min(valor, maximo) if maximo is not None else valor
+
+# Quantidade máxima de ingredientes por requisição do cálculo de nutrientes
+INGREDIENTES_MAXIMO = 2000
+
+def ler_ingredientes(corpo):
+    """Lê os pares (codigo, gramas) do corpo JSON do cálculo de nutrientes"""
+    if isinstance(corpo, dict):
+        corpo = corpo.get('ingredientes')
+    if not isinstance(corpo, list):
+        raise ValueError('Envie uma lista de ingredientes com código e gramas')
+    if len(corpo) > INGREDIENTES_MAXIMO:
+        raise ValueError(f'Máximo de {INGREDIENTES_MAXIMO} ingredientes por requisição')
+    
+    ingredientes = []
+    for item in corpo:
+        if isinstance(item, dict):
+            codigo, gramas = item.get('codigo'), item.get('gramas')
+        elif isinstance(item, (list, tuple)) and len(item) == 2:
+            codigo, gramas = item
+        else:
+            raise ValueError(f'Ingrediente inválido: {item!r}')
         try:
-            max_val = float(max_lipideos)
-            if 'lipideos' in resultados.columns:
-                resultados = resultados[resultados['lipideos'] <= max_val]
-            elif 'Lipideos' in resultados.columns:
-                resultados = resultados[resultados['Lipideos'] <= max_val]
-        except ValueError:
-            pass
+            quantidade = math.nan if isinstance(gramas, bool) or not isinstance(gramas, (int, float)) else float(gramas)
+        except OverflowError:
+            # Inteiros do JSON grandes demais para um float
+            quantidade = math.inf
+        if not math.isfinite(quantidade) or quantidade < 0:
+            raise ValueError(f'Quantidade inválida para o ingrediente {codigo!r}: {gramas!r}')
+        if codigo is None:
+            raise ValueError('Ingrediente sem código')
+        ingredientes.append((str(codigo), quantidade))
+    return ingredientes
+
+def calcular_nutrientes(dados, posicoes, gramas):
+    """Nutrientes de cada ingrediente e o total, para as quantidades em gramas"""
+    nomes, matriz = dados.matriz_nutrientes()
+    parciais = matriz[np.asarray(posicoes, dtype=np.intp)] * (np.asarray(gramas, dtype=np.float64) / 100)[:, None]
+    ausentes = np.isnan(parciais)
+    total = np.where(ausentes, 0.0, parciais).sum(axis=0)
+    return nomes, parciais, total, ausentes.any(axis=0)
+
+# Nutrientes comparados por padrão na busca de alimentos similares, e quantidade
+# padrão e máxima de similares por requisição
+NUTRIENTES_SIMILARES = ('energia', 'proteina', 'carboidratos', 'lipideos')
+SIMILARES_PADRAO = 10
+SIMILARES_MAXIMO = 100
+
+def ler_nutrientes_similares(valor, dados):
+    """Nutrientes comparados na busca de similares (nutrientes=energia,ferro,...)"""
+    nomes = dados.matriz_nutrientes()[0]
+    pedidos = valor.split(',') if valor else NUTRIENTES_SIMILARES
+    nutrientes = {resolver_nutriente(nome.strip())[0] for nome in pedidos}
+    # Em ordem fixa: a distância não depende da ordem e o índice é reaproveitado
+    return tuple(sorted(nutriente for nutriente in nutrientes if nutriente in nomes))
+
+# Linhas serializadas por vez nas respostas da API (o NDJSON é enviado bloco a bloco)
+BLOCO_SERIALIZACAO = 1000
+
+# Respostas menores que isso (em bytes) não são comprimidas com gzip
+GZIP_MINIMO = 1024
+
+def ler_campos(valor, dados):
+    """Lê a projeção de campos da API (campos=codigo,nome,energia)"""
+    if not valor:
+        return None
+    campos = []
+    for campo in (campo.strip() for campo in valor.split(',')):
+        if campo not in dados.colunas and campo != 'relevancia':
+            campo = dados.colunas_nutrientes.get(resolver_nutriente(campo)[0])
+        if campo and campo not in campos:
+            campos.append(campo)
+    return campos
+
+def codificar_coluna(serie):
+    """Valores de uma coluna como fragmentos de texto JSON (ausentes viram null)"""
+    if pd.api.types.is_float_dtype(serie.dtype):
+        valores = serie.to_numpy(dtype=np.float64, na_value=np.nan).tolist()
+        return [repr(valor) if math.isfinite(valor) else 'null' for valor in valores]
+    if pd.api.types.is_integer_dtype(serie.dtype) and isinstance(serie.dtype, np.dtype):
+        return [repr(valor) for valor in serie.tolist()]
+    if pd.api.types.is_bool_dtype(serie.dtype) and isinstance(serie.dtype, np.dtype):
+        return ['true' if valor else 'false' for valor in serie.tolist()]
     
-    # Ordenação dos resultados
-    if ordenar:
-        campo_ordenacao = ordenar
-        ordem_crescente = True
-        
-        if ordenar.startswith('-'):
-            campo_ordenacao = ordenar[1:]
-            ordem_crescente = False
-        
-        # Verifica se o campo existe
-        if campo_ordenacao in resultados.columns:
-            resultados = resultados.sort_values(campo_ordenacao, ascending=ordem_crescente)
+    fragmentos = []
+    for valor in serie.tolist():
+        if isinstance(valor, str):
+            fragmentos.append(encode_basestring(valor))
+        elif valor is None or (np.ndim(valor) == 0 and pd.isna(valor)):
+            fragmentos.append('null')
+        elif isinstance(valor, float):
+            fragmentos.append(repr(valor) if math.isfinite(valor) else 'null')
         else:
-            # Ordenação padrão por relevância
-            resultados = resultados.sort_values('relevancia', ascending=False)
+            fragmentos.append(json.dumps(valor, ensure_ascii=False, default=str))
+    return fragmentos
+
+def serializar_alimentos(dados, posicoes, relevancia=None, campos=None):
+    """Gera os alimentos das posições como objetos JSON, em blocos de texto"""
+    for inicio in range(0, len(posicoes), BLOCO_SERIALIZACAO):
+        fim = inicio + BLOCO_SERIALIZACAO
+        bloco = dados.reconstruir(posicoes[inicio:fim], relevancia[inicio:fim] if relevancia is not None else None, campos)
+        nomes = [campo for campo in campos if campo in bloco.columns] if campos is not None else sorted(bloco.columns)
+        # Um molde por bloco ('{"codigo":%s,"nome":%s}') preenchido com os valores já codificados
+        molde = '{' + ','.join(encode_basestring(str(nome)).replace('%', '%%') + ':%s' for nome in nomes) + '}'
+        colunas = [codificar_coluna(bloco[nome]) for nome in nomes]
+        yield [molde % valores for valores in zip(*colunas)] if colunas else ['{}'] * len(bloco)
+
+def resposta_serializada(partes, mimetype, stream=False):
+    """Resposta com o texto gerado por partes, comprimida com gzip se aceito"""
+    comprimir = request.accept_encodings['gzip'] > 0
+    if stream:
+        def gerar():
+            compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if comprimir else None
+            for parte in partes:
+                dados = parte.encode('utf-8')
+                yield compressor.compress(dados) if compressor else dados
+            if compressor:
+                yield compressor.flush()
+        resposta = Response(gerar(), mimetype=mimetype)
+    else:
+        corpo = ''.join(partes).encode('utf-8')
+        comprimir = comprimir and len(corpo) >= GZIP_MINIMO
+        resposta = Response(zlib.compress(corpo, 6, wbits=31) if comprimir else corpo, mimetype=mimetype)
+    
+    if comprimir:
+        resposta.headers['Content-Encoding'] = 'gzip'
+    resposta.vary.add('Accept-Encoding')
+    return resposta
+
+def resposta_alimentos(dados, posicoes, relevancia=None, campos=None):
+    """Resposta da API com uma lista de alimentos (array JSON ou ndjson)"""
+    blocos = serializar_alimentos(dados, posicoes, relevancia, campos)
+    if request.args.get('formato') == 'ndjson':
+        return resposta_serializada(('\n'.join(bloco) + '\n' for bloco in blocos),
+                                    'application/x-ndjson', stream=True)
+    return resposta_serializada(['[', ','.join(','.join(bloco) for bloco in blocos), ']'], 'application/json')
+
+@app.route('/')
+def index():
+    """Página inicial"""
+    categorias = carregar_categorias()
+    return render_template('index.html', categorias=categorias)
+
+@app.route('/buscar', methods=['GET', 'POST'])
+def buscar():
+    """Endpoint para buscar alimentos"""
+    categorias = carregar_categorias()
+    
+    # Os parâmetros vêm do formulário (POST) ou da URL (GET)
+    parametros = request.form if request.method == 'POST' else request.args
+    termo_busca = parametros.get('termo', '')
+    categoria = parametros.get('categoria', '').strip()
+    busca_exata = parametros.get('exatamente') == '1'
+    ordenar = parametros.get('ordenar', 'relevancia')
+    # Filtros de faixa de qualquer nutriente (minEnergia, maxProteina, minFerro...)
+    faixas = ler_faixas_nutrientes(parametros)
+    
+    # Paginação: só a página pedida é selecionada e enviada ao template
+    pagina = parametro_inteiro(parametros.get('pagina'), 1, minimo=1)
+    por_pagina = parametro_inteiro(parametros.get('por_pagina'), POR_PAGINA, minimo=1, maximo=POR_PAGINA_MAXIMO)
+    
+    def url_pagina(numero):
+        """Link para outra página da mesma busca"""
+        return url_for('buscar', **{**parametros.to_dict(), 'pagina': numero})
+    
+    # Carrega os dados da categoria selecionada ou todos os dados
+    with metricas.etapa('dados'):
+        dados = carregar_dados(categoria if categoria else None)
+    
+    if dados.empty:
+        return render_template('resultados.html', resultados=[], total=0, termo=termo_busca, categorias=categorias)
+    
+    # Consultas repetidas são atendidas pelo cache de resultados
+    chave = chave_consulta('buscar', dados, termo_busca, busca_exata,
+                           tuple(sorted(faixas.items())), ordenar, pagina, por_pagina)
+    em_cache = cache_consultas.obter(chave)
+    if em_cache is not None:
+        posicoes, relevancia, total = em_cache
     else:
-        # Ordenação padrão por relevância
-        resultados = resultados.sort_values('relevancia', ascending=False)
+        posicoes, relevancia, total = executar_busca(dados, termo_busca, busca_exata, ordenar, faixas,
+                                                     inicio=(pagina - 1) * por_pagina, quantidade=por_pagina)
+        total = np.array([total])
+        cache_consultas.guardar(chave, (posicoes, relevancia, total))
+    total_paginas = max(1, -(-int(total[0]) // por_pagina))
+    
+    # Página além da última: redireciona para a última página com resultados
+    if pagina > total_paginas:
+        return redirect(url_pagina(total_paginas))
     
-    # Converte para dicionário para enviar ao template
-    resultados_dict = resultados.to_dict('records')
+    # Converte apenas a página para dicionário para enviar ao template
+    with metricas.etapa('serializacao'):
+        resultados_dict = dados.reconstruir(posicoes, relevancia).to_dict('records')
     
-    return render_template('resultados.html', 
-                          resultados=resultados_dict, 
-                          termo=termo_busca,
-                          categorias=categorias)
+    with metricas.etapa('renderizacao'):
+        return render_template('resultados.html', 
+                              resultados=resultados_dict, 
+                              codigos=dados.codigos(posicoes),
+                              total=int(total[0]),
+                              inicio=(pagina - 1) * por_pagina,
+                              pagina=pagina,
+                              total_paginas=total_paginas,
+                              url_pagina=url_pagina,
+                              termo=termo_busca,
+                              categorias=categorias)
 
 @app.route('/api/alimentos', methods=['GET'])
 def api_alimentos():
     """API para buscar alimentos"""
     categorias = carregar_categorias()
     termo_busca = request.args.get('termo', '')
-    categoria = request.args.get('categoria', '')
-    limite = int(request.args.get('limite', 50))
+    categoria = request.args.get('categoria', '').strip()
+    limite = parametro_inteiro(request.args.get('limite'), 50)
+    offset = parametro_inteiro(request.args.get('offset'), 0)
+    faixas = ler_faixas_nutrientes(request.args)
     
     # Carrega os dados da categoria selecionada ou todos os dados
-    df = carregar_dados(categoria if categoria else None)
+    with metricas.etapa('dados'):
+        dados = carregar_dados(categoria if categoria else None)
     
-    if df.empty:
-        return jsonify([])
+    if dados.empty:
+        resposta = resposta_alimentos(dados, np.empty(0, dtype=np.intp))
+        resposta.headers['X-Total-Count'] = '0'
+        return resposta
     
-    # Realiza a busca pelo termo em várias colunas
-    if termo_busca:
-        # Divide o termo de busca em palavras individuais para busca mais precisa
-        termos = termo_busca.lower().split()
-        
-        # Verifica quais colunas estão disponíveis para busca
-        colunas_busca = ['alimento', 'nome', 'descricao', 'nomeIngles', 'nomeCientifico'] 
-        colunas_busca = [col for col in colunas_busca if col in df.columns]
-        
-        # Criar coluna de pontuação para classificar os resultados por relevância
-        df['relevancia'] = 0
-        
-        if colunas_busca:
-            # Inicializa DataFrame vazio para os resultados
-            resultados = pd.DataFrame()
-            
-            # Atribui pesos para diferentes tipos de correspondência
-            # Correspondência exata tem peso maior que correspondência parcial
-            for termo in termos:
-                for col in colunas_busca:
-                    if col in df.columns:
-                        # Correspondência exata (termo completo)
-                        mask_exata = df[col].str.lower().str.contains(rf'\b{termo}\b', regex=True, case=False, na=False)
-                        df.loc[mask_exata, 'relevancia'] += 10
-                        
-                        # Correspondência parcial (termo como substring)
-                        mask_parcial = df[col].str.lower().str.contains(termo, regex=False, case=False, na=False)
-                        df.loc[mask_parcial, 'relevancia'] += 5
-                        
-                        # Correspondência no início do texto (maior relevância)
-                        mask_inicio = df[col].str.lower().str.startswith(termo, na=False)
-                        df.loc[mask_inicio, 'relevancia'] += 3
-            
-            # Filtra apenas resultados com alguma relevância
-            resultados = df[df['relevancia'] > 0].sort_values('relevancia', ascending=False)
-            
-            # Se não houver resultados exatos, tenta busca mais flexível
-            if resultados.empty:
-                for termo in termos:
-                    # Busca com tolerância a erros (permitindo variações no termo)
-                    for col in colunas_busca:
-                        if col in df.columns:
-                            # Usa regex com padrão mais flexível
-                            pattern = ''.join(f'[{c}{c.upper()}].*?' for c in termo)
-                            mask_fuzzy = df[col].str.contains(pattern, regex=True, na=False)
-                            df.loc[mask_fuzzy, 'relevancia'] += 2
-                
-                # Filtra resultados da busca fuzzy
-                resultados = df[df['relevancia'] > 0].sort_values('relevancia', ascending=False)
-        else:
-            resultados = pd.DataFrame()
+    # Consultas repetidas são atendidas pelo cache de resultados
+    chave = chave_consulta('api_alimentos', dados, termo_busca, False,
+                           tuple(sorted(faixas.items())), limite, offset)
+    em_cache = cache_consultas.obter(chave)
+    if em_cache is not None:
+        posicoes, relevancia, total = em_cache
     else:
-        # Se não houver termo de busca, retorna os primeiros N resultados
-        resultados = df.head(limite)
+        posicoes, relevancia, total = executar_busca_api(dados, termo_busca, limite, offset, faixas)
+        total = np.array([total])
+        cache_consultas.guardar(chave, (posicoes, relevancia, total))
     
-    # Limita o número de resultados
-    resultados = resultados.head(limite)
+    # Escreve a página em JSON direto das colunas (só os campos pedidos); o total vai no cabeçalho
+    with metricas.etapa('serializacao'):
+        resposta = resposta_alimentos(dados, posicoes, relevancia, ler_campos(request.args.get('campos'), dados))
+    resposta.headers['X-Total-Count'] = str(int(total[0]))
+    return resposta
+
+@app.route('/api/alimentos/lote', methods=['GET'])
+def api_alimentos_lote():
+    """API para buscar vários alimentos pelo código em uma única requisição"""
+    # Aceita codigos=A,B,C e/ou o parâmetro repetido (codigos=A&codigos=B)
+    codigos = [codigo.strip() for valor in request.args.getlist('codigos')
+               for codigo in valor.split(',') if codigo.strip()]
+    if len(codigos) > LOTE_MAXIMO:
+        return jsonify({'erro': f'Máximo de {LOTE_MAXIMO} códigos por requisição'}), 400
+    
+    dados = carregar_dados()
+    posicoes = [dados.posicao_codigo(codigo) if not dados.empty else None for codigo in codigos]
+    encontrados = [posicao for posicao in posicoes if posicao is not None]
+    nao_encontrados = [codigo for codigo, posicao in zip(codigos, posicoes) if posicao is None]
     
-    # Converte para dicionário e depois para JSON
-    return jsonify(resultados.to_dict('records'))
+    # Alimentos na ordem pedida, escritos direto das colunas; códigos sem alimento vão à parte
+    blocos = serializar_alimentos(dados, encontrados, campos=ler_campos(request.args.get('campos'), dados))
+    return resposta_serializada(['{"alimentos":[', ','.join(','.join(bloco) for bloco in blocos),
+                                 '],"nao_encontrados":', json.dumps(nao_encontrados), '}'], 'application/json')
+
+@app.route('/api/calcular', methods=['POST'])
+def api_calcular():
+    """API para calcular os nutrientes de uma receita ou refeição a partir dos ingredientes"""
+    try:
+        ingredientes = ler_ingredientes(request.get_json(silent=True))
+    except ValueError as erro:
+        return jsonify({'erro': str(erro)}), 400
+    
+    dados = carregar_dados()
+    posicoes = [dados.posicao_codigo(codigo) if not dados.empty else None for codigo, _ in ingredientes]
+    encontrados = [(ingrediente, posicao) for ingrediente, posicao in zip(ingredientes, posicoes) if posicao is not None]
+    nomes, parciais, total, incompletos = calcular_nutrientes(
+        dados, [posicao for _, posicao in encontrados], [gramas for (_, gramas), _ in encontrados])
+    
+    # Nome do alimento de cada ingrediente, para conferência
+    coluna_nome = next((col for col in ('alimento', 'nome') if col in dados.colunas), None)
+    nomes_alimentos = (dados.df[coluna_nome].iloc[[posicao for _, posicao in encontrados]].tolist()
+                       if coluna_nome and encontrados else [None] * len(encontrados))
+    
+    # Valores ausentes de um ingrediente saem como null
+    return jsonify({
+        'total': dict(zip(nomes, total.tolist())),
+        'ingredientes': [
+            {
+                'codigo': codigo,
+                'alimento': nome if isinstance(nome, str) else None,
+                'gramas': gramas,
+                'nutrientes': {nutriente: None if math.isnan(valor) else valor for nutriente, valor in zip(nomes, linha)},
+            }
+            for ((codigo, gramas), _), nome, linha in zip(encontrados, nomes_alimentos, parciais.tolist())
+        ],
+        'nutrientes_incompletos': [nutriente for nutriente, falta in zip(nomes, incompletos.tolist()) if falta],
+        'nao_encontrados': [codigo for (codigo, _), posicao in zip(ingredientes, posicoes) if posicao is None],
+    })
+
+@app.route('/api/alimentos/<codigo>/similares', methods=['GET'])
+def api_alimentos_similares(codigo):
+    """API para buscar os alimentos com composição nutricional mais parecida com a de um alimento"""
+    categoria = request.args.get('categoria', '')
+    limite = parametro_inteiro(request.args.get('limite'), SIMILARES_PADRAO, minimo=1, maximo=SIMILARES_MAXIMO)
+    
+    dados = carregar_dados()
+    posicao = dados.posicao_codigo(codigo) if not dados.empty else None
+    if posicao is None:
+        return jsonify({'erro': 'Alimento não encontrado'}), 404
+    
+    nutrientes = ler_nutrientes_similares(request.args.get('nutrientes'), dados)
+    if not nutrientes:
+        return jsonify({'erro': 'Nenhum dos nutrientes pedidos está disponível na tabela'}), 400
+    nomes, matriz = dados.matriz_nutrientes()
+    colunas = [nomes.index(nutriente) for nutriente in nutrientes]
+    referencia = matriz[posicao, colunas]
+    faltantes = [nutriente for nutriente, valor in zip(nutrientes, referencia.tolist()) if math.isnan(valor)]
+    if faltantes:
+        return jsonify({'erro': f'O alimento não tem valor de {", ".join(faltantes)}'}), 400
+    
+    # Candidatos restritos à categoria pedida (o índice é montado por categoria); uma
+    # categoria que não existe não cai na tabela inteira, como na busca
+    if categoria and not dados.tem_categoria(categoria):
+        return jsonify({'erro': f'Categoria não encontrada: {categoria}'}), 400
+    candidatos = carregar_dados(categoria) if categoria else dados
+    posicoes, distancias = candidatos.indice_similares(nutrientes).vizinhos(referencia, limite, excluir=posicao)
+    
+    coluna_nome = next((col for col in ('alimento', 'nome') if col in dados.colunas), None)
+    
+    def resumo(linha):
+        alimento = {
+            'codigo': dados.codigos([linha])[0],
+            'alimento': dados.df[coluna_nome].iat[linha] if coluna_nome else None,
+            'nutrientes': dict(zip(nutrientes, matriz[linha, colunas].tolist())),
+        }
+        if not isinstance(alimento['alimento'], str):
+            alimento['alimento'] = None
+        return alimento
+    
+    return jsonify({
+        'alimento': resumo(posicao),
+        'nutrientes': list(nutrientes),
+        'similares': [{**resumo(linha), 'distancia': distancia}
+                      for linha, distancia in zip(posicoes.tolist(), distancias.tolist())],
+    })
+
+@app.route('/api/sugestoes', methods=['GET'])
+def api_sugestoes():
+    """API do autocompletar: palavras e alimentos que começam pelo prefixo digitado"""
+    prefixo = request.args.get('prefixo', '')
+    limite = parametro_inteiro(request.args.get('limite'), SUGESTOES_PADRAO, minimo=1, maximo=SUGESTOES_MAXIMO)
+    
+    dados = carregar_dados()
+    sugestoes = dados.sugerir(prefixo, limite) if not dados.empty else {'termos': [], 'alimentos': []}
+    
+    # Respostas iguais podem ser reaproveitadas pelo navegador e por proxies (ETag + Cache-Control)
+    resposta = jsonify(prefixo=prefixo, **sugestoes)
+    resposta.cache_control.public = True
+    resposta.cache_control.max_age = SUGESTOES_MAX_AGE
+    resposta.add_etag()
+    return resposta.make_conditional(request)
 
 @app.route('/alimento/<id>')
 def detalhe_alimento(id):
@@ -466,37 +2261,62 @@ def detalhe_alimento(id):
     categorias = carregar_categorias()
     
     # Carrega todos os dados
-    df = carregar_dados()
+    dados = carregar_dados()
     
-    if df.empty:
+    if dados.empty:
         return render_template('erro.html', mensagem="Dados não encontrados", categorias=categorias), 404
     
-    # Busca o alimento pelo ID
-    if 'codigo' in df.columns:
-        alimento = df[df['codigo'] == id]
-    elif 'id' in df.columns:
-        alimento = df[df['id'] == id]
-    else:
-        # Se não houver coluna ID, usa o índice como ID
-        try:
-            id_num = int(id)
-            if id_num < len(df):
-                alimento = df.iloc[[id_num]]
-            else:
-                alimento = pd.DataFrame()
-        except:
-            alimento = pd.DataFrame()
+    # Busca o alimento pelo código no índice montado na carga dos dados
+    posicao = dados.posicao_codigo(id)
     
-    if alimento.empty:
+    if posicao is None:
         return render_template('erro.html', mensagem="Alimento não encontrado", categorias=categorias), 404
     
     # Converte para dicionário
-    alimento_dict = alimento.iloc[0].to_dict()
+    alimento_dict = dados.df.iloc[posicao].to_dict()
     
     return render_template('detalhe.html', alimento=alimento_dict, categorias=categorias)
 
+@app.route('/metrics')
+def metrics():
+    """Métricas da aplicação no formato do Prometheus (só com TBCA_METRICAS=1)"""
+    if not metricas.ativa:
+        abort(404)
+    return app.response_class(metricas.texto_prometheus(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/metrics/perfil', methods=['GET', 'POST'])
+def metrics_perfil():
+    """Profiler por amostragem (só com TBCA_METRICAS=1)"""
+    if not metricas.ativa:
+        abort(404)
+    if request.method == 'POST':
+        if request.values.get('ativo') == '1':
+            intervalo = parametro_inteiro(request.values.get('intervalo_ms'), 0, minimo=1)
+            iniciar_perfil(intervalo / 1000 if intervalo else None)
+            return jsonify(ativo=True)
+        arquivos = parar_perfil(os.environ.get('TBCA_PERFIL_DIR'))
+        return jsonify(ativo=False, arquivos=arquivos)
+    if _perfil is None:
+        return app.response_class('', mimetype='text/plain')
+    return app.response_class(_perfil.pilhas(request.args.get('endpoint')), mimetype='text/plain')
+
 if __name__ == '__main__':
+    # Etapa de build: gera o cache colunar sem iniciar o servidor
+    if '--construir-cache' in sys.argv:
+        arquivo_json = os.path.join(DATA_DIR, 'tbca_dados_completos.json')
+        df = processar_json(arquivo_json)
+        if df is None:
+            sys.exit(f"Formato de dados JSON não reconhecido: {arquivo_json}")
+        salvar_cache_colunar(df, arquivo_json)
+        sys.exit(0)
+    
     # Carrega as categorias no início da aplicação
     categorias = carregar_categorias()
     print(f"Categorias disponíveis: {categorias}")
+    
+    # No modo debug, só o processo filho do reloader do Flask atende requisições
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        iniciar_recarregador()
+        if metricas.ativa and os.environ.get('TBCA_PERFIL', '0') not in ('', '0'):
+            iniciar_perfil()
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,367 @@
+"""
+Benchmarks da TBCA Web.
+
+Sem opções, gera um arquivo JSON sintético com o formato do
+tbca_dados_completos.json e mede o tempo e o pico de memória da normalização dos
+alimentos antes (json.load e laço por alimento, implementação original do
+carregar_dados) e depois (leitura incremental e colunas em lote do processar_json),
+com os 8 nutrientes que o laço original reconhece.
+
+Com --suite, gera catálogos sintéticos com 1×, 10× e 100× o tamanho da TBCA e,
+para cada um, mede a carga dos dados e as requisições a /buscar, /api/alimentos e
+/alimento/<codigo> pelo cliente de testes do Flask, com uma mistura de consultas
+(busca exata, vários termos, busca aproximada, faixas de nutrientes, ordenação).
+Cada tamanho roda em um processo separado, para que o pico de RSS seja o dele. Os
+resultados (p50/p99 de latência, vazão e pico de RSS) são gravados em JSON para
+comparar execuções.
+
+Uso:
+    python tbca_web/benchmark.py --alimentos 5000 --repeticoes 5
+    python tbca_web/benchmark.py --suite --escalas 1,10,100 --saida benchmark.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError:  # Windows: sem pico de RSS
+    resource = None
+
+import app as aplicacao
+from app import processar_json
+
+PALAVRAS = [
+    'arroz', 'feijão', 'carne', 'bovina', 'frango', 'peito', 'coxa', 'maçã', 'banana',
+    'laranja', 'leite', 'integral', 'desnatado', 'cozido', 'cru', 'frito', 'assado', 'pão',
+    'trigo', 'aveia', 'milho', 'batata', 'doce', 'inglesa', 'tomate', 'alface', 'queijo',
+    'minas', 'ovo', 'peixe', 'tilápia', 'açúcar', 'mel', 'óleo', 'soja', 'azeite', 'café',
+    'suco', 'polpa', 'farinha', 'mandioca', 'tapioca', 'biscoito', 'chocolate',
+]
+
+GRUPOS = [
+    'Cereais e derivados', 'Frutas e derivados', 'Carnes e derivados', 'Leite e derivados',
+    'Verduras, hortaliças e derivados', 'Pescados e frutos do mar', 'Leguminosas e derivados',
+]
+
+NUTRIENTES = [
+    'energia', 'energia_kj', 'proteina', 'lipídeos', 'carboidratos', 'fibra', 'cálcio',
+    'ferro', 'sodio', 'potassio', 'magnesio', 'zinco', 'colesterol', 'vitamina_c',
+]
+
+# Nutrientes que o laço original reconhece: a comparação antes/depois usa só eles,
+# para que as duas implementações convertam o mesmo conjunto de valores
+NUTRIENTES_LEGADO = NUTRIENTES[:8]
+
+# Tamanho aproximado do catálogo real da TBCA (escala 1× da suíte)
+TAMANHO_CATALOGO = 5000
+
+# Erros de digitação usados para exercitar a busca aproximada
+ERROS_DIGITACAO = ['arrox', 'fejão', 'frnago', 'bananna', 'leitte', 'batatta', 'quejo', 'tomatte']
+
+
+def valor_sintetico(aleatorio):
+    """Valor de nutriente nos formatos encontrados na TBCA"""
+    sorteio = aleatorio.random()
+    if sorteio < 0.05:
+        return 'tr'
+    if sorteio < 0.10:
+        return '-'
+    if sorteio < 0.50:
+        return f'{aleatorio.uniform(0, 40):.2f}'.replace('.', ',')
+    return round(aleatorio.uniform(0, 40), 2)
+
+
+def iterar_alimentos(quantidade, semente=42, nutrientes=NUTRIENTES):
+    """Gera alimentos sintéticos no formato do JSON da TBCA, um de cada vez"""
+    aleatorio = random.Random(semente)
+    for i in range(quantidade):
+        partes = [' '.join(aleatorio.sample(PALAVRAS, aleatorio.randint(1, 2))) for _ in range(aleatorio.randint(1, 3))]
+        nome = ', '.join(partes).capitalize()
+        yield {
+            'codigo': f'BRC{i:07d}',
+            'nome': nome,
+            'nome_cientifico': '',
+            'grupo': aleatorio.choice(GRUPOS),
+            'marca': '',
+            'nutrientes': {nutriente: valor_sintetico(aleatorio) for nutriente in nutrientes},
+        }
+
+
+def gerar_alimentos(quantidade, semente=42, nutrientes=NUTRIENTES):
+    """Gera uma lista de alimentos sintéticos no formato do JSON da TBCA"""
+    return list(iterar_alimentos(quantidade, semente, nutrientes))
+
+
+def gravar_alimentos(arquivo_json, quantidade, semente=42):
+    """Grava o JSON sintético alimento por alimento, sem montar a lista inteira"""
+    with open(arquivo_json, 'w', encoding='utf-8') as f:
+        f.write('[')
+        for i, alimento in enumerate(iterar_alimentos(quantidade, semente)):
+            if i:
+                f.write(',')
+            json.dump(alimento, f, ensure_ascii=False)
+        f.write(']')
+
+
+def processar_json_legado(arquivo_json):
+    """Implementação original do carregar_dados (laço por alimento), usada como referência"""
+    import pandas as pd
+
+    with open(arquivo_json, 'r', encoding='utf-8') as f:
+        dados_json = json.load(f)
+
+    alimentos_processados = []
+    for alimento in dados_json:
+        item = {
+            'codigo': alimento.get('codigo', ''),
+            'alimento': alimento.get('nome', ''),
+            'nome': alimento.get('nome', ''),
+            'nome_cientifico': alimento.get('nome_cientifico', ''),
+            'grupo': alimento.get('grupo', ''),
+            'marca': alimento.get('marca', ''),
+            'categoria': alimento.get('grupo', '').lower().replace(' ', '_')
+        }
+        nutrientes = alimento.get('nutrientes', {})
+        if nutrientes:
+            mapeamento_nutrientes = {
+                'energia_kcal': ['energia', 'kcal', 'energia_kcal', 'calorias'],
+                'energia_kj': ['energia_kj', 'kj'],
+                'proteina': ['proteina', 'proteinas', 'protein'],
+                'lipideos': ['lipideos', 'lipídeos', 'gorduras', 'fat'],
+                'carboidratos': ['carboidratos', 'carboidrato', 'carbohydrates'],
+                'fibra': ['fibra', 'fibras', 'fiber'],
+                'calcio': ['calcio', 'cálcio', 'calcium'],
+                'ferro': ['ferro', 'iron']
+            }
+            for nutriente_nome, possiveis_chaves in mapeamento_nutrientes.items():
+                for chave in possiveis_chaves:
+                    if chave in nutrientes:
+                        valor = nutrientes[chave]
+                        try:
+                            if isinstance(valor, str):
+                                valor_limpo = valor.replace(',', '.').replace('g', '').replace('mg', '').replace('kcal', '').replace('kJ', '').strip()
+                                if valor_limpo and valor_limpo != 'tr' and valor_limpo != '-':
+                                    item[nutriente_nome] = float(valor_limpo)
+                            else:
+                                item[nutriente_nome] = float(valor)
+                        except (ValueError, TypeError):
+                            pass
+                        break
+        alimentos_processados.append(item)
+
+    df = pd.DataFrame(alimentos_processados)
+    if 'energia' not in df.columns and 'energia_kcal' in df.columns:
+        df['energia'] = df['energia_kcal']
+    return df
+
+
+def medir(funcao, argumento, repeticoes):
+    """Executa a função várias vezes; retorna os tempos em milissegundos e o último resultado"""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao(argumento)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return tempos, resultado
+
+
+def medir_memoria(funcao, argumento):
+    """Pico de memória alocada (em MB) durante uma execução da função"""
+    tracemalloc.start()
+    try:
+        funcao(argumento)
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return pico / (1024 * 1024)
+
+
+def pico_rss_mb():
+    """Pico de memória residente (RSS) do processo, em MB (None sem o módulo resource)"""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    return pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024
+
+
+def resumir_tempos(tempos, duracao=None):
+    """p50, p99 e média (em milissegundos) de uma lista de tempos em segundos"""
+    milissegundos = sorted(tempo * 1000 for tempo in tempos)
+    percentis = statistics.quantiles(milissegundos, n=100, method='inclusive') if len(milissegundos) > 1 else milissegundos * 99
+    resumo = {
+        'requisicoes': len(milissegundos),
+        'p50_ms': round(percentis[49], 3),
+        'p99_ms': round(percentis[98], 3),
+        'media_ms': round(statistics.fmean(milissegundos), 3),
+    }
+    if duracao:
+        resumo['vazao_rps'] = round(len(milissegundos) / duracao, 1)
+    return resumo
+
+
+def gerar_consultas(quantidade, alimentos, semente=42):
+    """Mistura de consultas da suíte, como pares (tipo, URL)"""
+    aleatorio = random.Random(semente)
+    palavra = lambda: aleatorio.choice(PALAVRAS)
+    tipos = {
+        'busca_simples': lambda: f'/buscar?termo={palavra()}',
+        'busca_varios_termos': lambda: f'/buscar?termo={palavra()}+{palavra()}+{palavra()}',
+        'busca_exata': lambda: f'/buscar?termo={palavra()}+{palavra()}&exatamente=1',
+        'busca_aproximada': lambda: f'/buscar?termo={aleatorio.choice(ERROS_DIGITACAO)}',
+        'busca_faixas': lambda: f'/buscar?termo={palavra()}&minProteina={aleatorio.randint(0, 20)}&maxLipideos={aleatorio.randint(10, 40)}',
+        'busca_ordenada': lambda: f'/buscar?termo={palavra()}&ordenar={aleatorio.choice(["alimento", "-alimento", "energia", "-energia"])}',
+        'busca_categoria': lambda: f'/buscar?categoria={aleatorio.choice(["cereais", "frutas", "carnes", "leite"])}&termo={palavra()}&pagina={aleatorio.randint(1, 3)}',
+        'api_busca': lambda: f'/api/alimentos?termo={palavra()}&limite=50',
+        'api_faixas': lambda: f'/api/alimentos?minEnergia={aleatorio.randint(0, 20)}&maxEnergia={aleatorio.randint(20, 40)}&limite=100',
+        'detalhe': lambda: f'/alimento/BRC{aleatorio.randrange(alimentos):07d}',
+    }
+    nomes = list(tipos)
+    return [(tipo, tipos[tipo]()) for tipo in (aleatorio.choice(nomes) for _ in range(quantidade))]
+
+
+def executar_escala(alimentos, consultas, usar_cache, semente):
+    """Mede a carga e as consultas de um catálogo com a quantidade de alimentos dada"""
+    with tempfile.TemporaryDirectory() as diretorio:
+        arquivo_json = os.path.join(diretorio, 'tbca_dados_completos.json')
+        gravar_alimentos(arquivo_json, alimentos, semente)
+
+        aplicacao.DATA_DIR = diretorio
+        aplicacao.CATEGORIAS = []
+        if not usar_cache:
+            aplicacao.cache_consultas.max_entradas = 0
+        cliente = aplicacao.app.test_client()
+        saida = io.StringIO()
+
+        with contextlib.redirect_stdout(saida):
+            # Carga a frio (JSON + cache colunar) e a partir do cache colunar
+            inicio = time.perf_counter()
+            aplicacao.carregar_dados()
+            carga_fria = time.perf_counter() - inicio
+            aplicacao.dados_cache.clear()
+            inicio = time.perf_counter()
+            aplicacao.carregar_dados()
+            carga_cache = time.perf_counter() - inicio
+
+            # Aquecimento: índices montados sob demanda ficam fora das medições
+            aplicacao.carregar_dados().aquecer()
+            for _, url in gerar_consultas(20, alimentos, semente + 1):
+                cliente.get(url)
+
+            tempos = {}
+            inicio_total = time.perf_counter()
+            for tipo, url in gerar_consultas(consultas, alimentos, semente):
+                inicio = time.perf_counter()
+                resposta = cliente.get(url)
+                tempos.setdefault(tipo, []).append(time.perf_counter() - inicio)
+                if resposta.status_code >= 500:
+                    raise RuntimeError(f'{url} respondeu {resposta.status_code}')
+            duracao = time.perf_counter() - inicio_total
+
+    return {
+        'alimentos': alimentos,
+        'carga_ms': {'json': round(carga_fria * 1000, 1), 'cache_colunar': round(carga_cache * 1000, 1)},
+        'consultas': {tipo: resumir_tempos(tempos[tipo]) for tipo in sorted(tempos)},
+        'total': resumir_tempos([tempo for lista in tempos.values() for tempo in lista], duracao),
+        'pico_rss_mb': pico_rss_mb(),
+    }
+
+
+def versao_codigo():
+    """Commit do git do código medido (None fora de um repositório)"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def executar_suite(args):
+    """Roda a suíte em cada escala, cada uma em um processo novo, e grava o JSON"""
+    import numpy
+    import pandas
+
+    escalas = [int(escala) for escala in args.escalas.split(',')]
+    resultado = {
+        'data': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': versao_codigo(),
+        'ambiente': {
+            'python': platform.python_version(),
+            'numpy': numpy.__version__,
+            'pandas': pandas.__version__,
+            'plataforma': platform.platform(),
+        },
+        'parametros': {'consultas': args.consultas, 'cache_resultados': args.cache, 'semente': args.semente},
+        'escalas': {},
+    }
+
+    print(f'Suíte com {args.consultas} consultas por escala (catálogo 1× = {TAMANHO_CATALOGO} alimentos)')
+    contexto = multiprocessing.get_context('spawn')
+    for escala in escalas:
+        alimentos = TAMANHO_CATALOGO * escala
+        with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as executor:
+            medicao = executor.submit(executar_escala, alimentos, args.consultas, args.cache, args.semente).result()
+        resultado['escalas'][f'{escala}x'] = medicao
+
+        total = medicao['total']
+        print(f'\n{escala}× ({alimentos} alimentos): carga {medicao["carga_ms"]["json"]:.0f} ms '
+              f'(cache colunar {medicao["carga_ms"]["cache_colunar"]:.0f} ms), pico RSS {medicao["pico_rss_mb"] or 0:.0f} MB')
+        for tipo, resumo in medicao['consultas'].items():
+            print(f'   - {tipo:22} p50 {resumo["p50_ms"]:8.2f} ms   p99 {resumo["p99_ms"]:8.2f} ms   ({resumo["requisicoes"]} requisições)')
+        print(f'   = {"total":22} p50 {total["p50_ms"]:8.2f} ms   p99 {total["p99_ms"]:8.2f} ms   {total["vazao_rps"]:.0f} req/s')
+
+    with open(args.saida, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+    print(f'\nResultados gravados em {args.saida}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks da TBCA Web')
+    parser.add_argument('--alimentos', type=int, default=5000, help='quantidade de alimentos sintéticos')
+    parser.add_argument('--repeticoes', type=int, default=5, help='repetições de cada medição')
+    parser.add_argument('--suite', action='store_true', help='roda a suíte de carga e consultas em várias escalas')
+    parser.add_argument('--escalas', default='1,10,100', help='múltiplos do tamanho da TBCA medidos pela suíte')
+    parser.add_argument('--consultas', type=int, default=500, help='consultas por escala na suíte')
+    parser.add_argument('--cache', action='store_true', help='mantém o cache de resultados das buscas ligado na suíte')
+    parser.add_argument('--semente', type=int, default=42, help='semente dos dados e das consultas sintéticas')
+    parser.add_argument('--saida', default='benchmark.json', help='arquivo JSON com os resultados da suíte')
+    args = parser.parse_args()
+
+    if args.suite:
+        executar_suite(args)
+        return
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        arquivo_json = os.path.join(diretorio, 'tbca_dados_completos.json')
+        with open(arquivo_json, 'w', encoding='utf-8') as f:
+            json.dump(gerar_alimentos(args.alimentos, nutrientes=NUTRIENTES_LEGADO), f, ensure_ascii=False)
+
+        print(f'Carga de {args.alimentos} alimentos com {len(NUTRIENTES_LEGADO)} nutrientes '
+              f'({args.repeticoes} repetições)')
+        implementacoes = {
+            'antes (laço por alimento)': processar_json_legado,
+            'depois (incremental)': processar_json,
+        }
+        for nome, funcao in implementacoes.items():
+            tempos, df = medir(funcao, arquivo_json, args.repeticoes)
+            pico = medir_memoria(funcao, arquivo_json)
+            print(f'   - {nome:28} mediana {statistics.median(tempos):8.1f} ms   '
+                  f'mínimo {min(tempos):8.1f} ms   pico {pico:7.1f} MB   {len(df.columns)} colunas')
+
+
+if __name__ == '__main__':
+    main()
@@ -20,6 +20,9 @@ document.addEventListener('DOMContentLoaded', function() {
     
     // Inicializar componentes do Bootstrap
     initBootstrapComponents();
+    
+    // Sugestões enquanto o usuário digita na busca
+    initSearchSuggestions();
 });
 
 /**
@@ -103,3 +106,67 @@ function initBootstrapComponents() {
     // Mostrar toasts automaticamente
     toastList.forEach(toast => toast.show());
 }
+
+/**
+ * Sugere palavras e alimentos no campo de busca enquanto o usuário digita
+ * (consulta /api/sugestoes e preenche um datalist)
+ */
+function initSearchSuggestions() {
+    const inputs = document.querySelectorAll('input[name="termo"]');
+    // Respostas já recebidas, por prefixo
+    const cache = new Map();
+    
+    inputs.forEach((input, index) => {
+        const datalist = document.createElement('datalist');
+        datalist.id = `sugestoes-termo-${index}`;
+        input.after(datalist);
+        input.setAttribute('list', datalist.id);
+        input.setAttribute('autocomplete', 'off');
+        
+        let timer = null;
+        let controller = null;
+        
+        const showSuggestions = data => {
+            const values = new Set();
+            data.termos.forEach(termo => values.add(termo.texto));
+            data.alimentos.forEach(alimento => values.add(alimento.nome));
+            
+            datalist.replaceChildren(...[...values].map(value => {
+                const option = document.createElement('option');
+                option.value = value;
+                return option;
+            }));
+        };
+        
+        input.addEventListener('input', function() {
+            const prefix = this.value.trim();
+            clearTimeout(timer);
+            if (prefix.length < 2) {
+                datalist.replaceChildren();
+                return;
+            }
+            if (cache.has(prefix)) {
+                showSuggestions(cache.get(prefix));
+                return;
+            }
+            
+            // Espera uma pausa na digitação e cancela a consulta anterior ainda pendente
+            timer = setTimeout(() => {
+                if (controller) {
+                    controller.abort();
+                }
+                controller = new AbortController();
+                
+                fetch(`/api/sugestoes?prefixo=${encodeURIComponent(prefix)}`, { signal: controller.signal })
+                    .then(response => response.ok ? response.json() : null)
+                    .then(data => {
+                        if (data) {
+                            cache.set(prefix, data);
+                            showSuggestions(data);
+                        }
+                    })
+                    .catch(() => {});
+            }, 120);
+        });
+    });
+}